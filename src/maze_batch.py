@@ -0,0 +1,215 @@
+"""
+Batched solving of many same-size mazes at once.
+The decoded grids are stacked into one (mazes x rows x columns) NumPy array and every BFS
+distance transform runs for all mazes together, one wavefront layer per array operation.
+Goal paths are planned with MazePlanner on the resulting distance tables, then the paths
+are walked down the distance fields for all mazes in lockstep.
+
+Run directly to compare throughput with looping MazeSolverV2.
+Refer to README.md for the method.
+"""
+
+
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+from maze_planner import MazePlanner, INF
+from maze_container import open_archive
+
+
+CHECK_EVERY = 16    #Wavefront layers between dropping the mazes whose search has finished
+
+
+class MazeBatch:
+    """
+    Stack of mazes of one size, each given as (MazeGrid, Start Point, End Point, Entities)
+    like MazeArchive / MazeContainer items.
+    """
+
+    def __init__(self, mazes, planner='auto'):
+        """Stacks the walls of mazes, planner picks the MazePlanner strategy"""
+
+        self.mazes = list(mazes)
+        if not self.mazes:
+            raise ValueError("Empty maze batch")
+        first = self.mazes[0][0]
+        if any((grid.width, grid.height) != (first.width, first.height) for grid, *_ in self.mazes):
+            raise ValueError(f"Batch mixes maze sizes, expected {first.width}x{first.height} only")
+        self.grid = first
+        self.planner = planner
+        #Flat cell ids are shared by every maze, so the stack is (mazes x cells)
+        self.open = np.stack([np.frombuffer(grid.cells, dtype=np.uint8) == 0 for grid, *_ in self.mazes])
+
+    def __len__(self):
+        return len(self.mazes)
+
+    @staticmethod
+    def from_archive(path, indices=None):
+        """MazeBatch of the mazes of a container or archive (default: all of them)"""
+
+        with open_archive(path) as archive:
+            indices = range(len(archive)) if indices is None else indices
+            return MazeBatch([archive[i] for i in indices])
+
+    def distance_fields(self, sources):
+        """
+        BFS distance from sources[n] (a cell id) to every cell of maze n, all mazes at once.
+        Returns an int16 (int32 past 32767 cells) (mazes x cells) array, -1 for walls and unreachable cells.
+        A cell first reached at layer d spent d layers in the unseen set, so counting
+        unseen layers gives the distances without a scatter per layer. Every CHECK_EVERY
+        layers the mazes whose wavefront died out are written back and dropped from the stack.
+        """
+        stride = self.grid.stride
+        out = np.empty(self.open.shape, dtype=np.int16 if self.open.shape[1] < 1 << 15 else np.int32)
+        live = np.arange(len(self))
+        frontier = np.zeros_like(self.open)
+        frontier[live, sources] = True
+        unseen = self.open & ~frontier
+        dist = np.zeros_like(out)
+        spread = np.empty_like(frontier)
+        layer = 0
+        while len(live):
+            np.logical_or(frontier[:, :-2], frontier[:, 2:], out=spread[:, 1:-1])
+            spread[:, stride:] |= frontier[:, :-stride]
+            spread[:, :-stride] |= frontier[:, stride:]
+            np.logical_and(spread, unseen, out=frontier)
+            np.add(dist, unseen, out=dist)
+            unseen ^= frontier
+            layer += 1
+            if layer % CHECK_EVERY == 0 or len(live) == 1:
+                running = frontier.any(axis=1)
+                if not running.all():
+                    done = ~running
+                    out[live[done]] = np.where(unseen[done] | ~self.open[live[done]], -1, dist[done])
+                    live, frontier, unseen, dist = live[running], frontier[running], unseen[running], dist[running]
+                    spread = np.empty_like(frontier)
+        return out
+
+    def _points(self):
+        """Cell ids (mazes x points) of start, gems, monsters, hearts and end, padded with the start"""
+
+        points = [[start] + ents['gems'] + ents['monsters'] + ents['hearts'] + [end] for _, start, end, ents in self.mazes]
+        width = max(len(p) for p in points)
+        ids = np.array([[grid.index(*p) for p in ps] + [grid.index(*ps[0])] * (width - len(ps))
+            for ps, (grid, *_) in zip(points, self.mazes)])
+        return points, ids
+
+    def _walk(self, fields, sources):
+        """
+        Steps every maze from its source down the distance field of its target.
+        fields (mazes x cells) belong to the targets. Returns (steps x mazes) cell ids,
+        row i is the cell reached after i + 1 moves, mazes that arrived repeat their target.
+        """
+        rows = np.arange(len(self))
+        offsets = np.array(self.grid.offsets)
+        cell = np.array(sources)
+        remaining = fields[rows, cell]
+        steps = []
+        for _ in range(int(remaining.max(initial=0))):
+            around = fields[rows[:, None], cell[:, None] + offsets]
+            #First neighbour in solver order that is one move closer, argmax picks the first True
+            closer = np.argmax(around == (remaining - 1)[:, None], axis=1)
+            moving = remaining > 0
+            cell = np.where(moving, cell + offsets[closer], cell)
+            remaining = np.where(moving, remaining - 1, 0)
+            steps.append(cell)
+        return np.array(steps, dtype=np.int64).reshape(-1, len(self))
+
+    def solve(self):
+        """
+        Plans and solves every maze. Returns one dict per maze:
+        {'goal_path', 'path', 'length', 'skipped'}, path is the (x, y) route through every goal.
+        Entities walled off from the start point are left out and listed in skipped,
+        a walled off end point raises ValueError.
+        """
+        points, ids = self._points()
+        rows = np.arange(len(self))
+        #Distance field of every point of interest, then a table per maze read out of them
+        fields = [self.distance_fields(ids[:, k]) for k in range(ids.shape[1])]
+        tables = np.stack([f[rows[:, None], ids] for f in fields], axis=1)
+
+        goal_points = []
+        results = []
+        for n, (grid, start, end, entities) in enumerate(self.mazes):
+            reach = tables[n, 0]
+            if reach[len(points[n]) - 1] == -1:
+                raise ValueError(f"Maze {n}: End Point {end} is walled off from Start Point {start}")
+            keep = [j for j in range(len(points[n])) if reach[j] != -1]
+            kept = set(keep)
+            skipped, offset, lists = {}, 1, {}
+            for kind in ('gems', 'monsters', 'hearts'):
+                span = range(offset, offset + len(entities[kind]))
+                lists[kind] = [points[n][j] for j in span if j in kept]
+                if len(lists[kind]) < len(span):
+                    skipped[kind] = [points[n][j] for j in span if j not in kept]
+                offset += len(span)
+
+            table = [[INF if tables[n, i, j] == -1 else int(tables[n, i, j]) for j in keep] for i in keep]
+            planner = MazePlanner(grid)
+            planner.remember([points[n][j] for j in keep], table)
+            goal_path = planner.plan(start, lists['gems'], lists['monsters'], lists['hearts'], end, self.planner)
+            goal_points.append([points[n].index(p) for p in goal_path])
+            results.append({'goal_path': goal_path, 'skipped': skipped})
+
+        #Leg l of every maze walks together, mazes with fewer legs stand still at their end
+        paths = [[ids[n, 0]] for n in rows]
+        current = ids[:, 0].copy()
+        for leg in range(max(len(g) for g in goal_points)):
+            target = np.array([g[leg] if leg < len(g) else g[-1] for g in goal_points])
+            leg_fields = np.stack([fields[k][n] for n, k in enumerate(target)])
+            steps = self._walk(leg_fields, current)
+            lengths = leg_fields[rows, current]
+            for n in rows:
+                if leg < len(goal_points[n]):
+                    paths[n] += steps[:lengths[n], n].tolist()
+            current = ids[rows, target]
+
+        for result, path in zip(results, paths):
+            result['path'] = [self.grid.coords(int(cell)) for cell in path]
+            result['length'] = len(path)
+        return results
+
+
+def _benchmark(count, size, method, seed, planner):
+    """Mazes per second of MazeBatch against one MazeSolverV2 (Multi-BFS) per maze, same container"""
+
+    from maze_generator import MazeGenerator
+    from maze_container import ContainerWriter
+    from maze_solverv2 import MazeSolverV2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "batch.mzc")
+        generator = MazeGenerator(size, size, seed)
+        with ContainerWriter(path) as container:
+            for _ in range(count):
+                container.add(generator.encode(method=method))
+
+        t0 = time.perf_counter()
+        looped = [MazeSolverV2(path, planner=planner, index=i).solve_maze(render=False, algorithms=['Multi-BFS'])['Multi-BFS']
+            for i in range(count)]
+        loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = MazeBatch.from_archive(path)
+        batch.planner = planner
+        batched = batch.solve()
+        batch_time = time.perf_counter() - t0
+
+    mismatched = sum(len(a['path']) != b['length'] for a, b in zip(looped, batched))
+    print("| Mazes | Size | Looped MazeSolverV2 (mazes/s) | MazeBatch (mazes/s) | Speedup | Length Mismatches |")
+    print("| --- | --- | --- | --- | --- | --- |")
+    print(f"| {count} {method} | {size}x{size} | {count / loop_time:.0f} | {count / batch_time:.0f} | "
+        f"{loop_time / batch_time:.1f}x | {mismatched} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched solving against looping MazeSolverV2.")
+    parser.add_argument('-n', '--count', type=int, default=1000, help="Number of mazes")
+    parser.add_argument('--size', type=int, default=30)
+    parser.add_argument('--method', default='backtracker', choices=['backtracker', 'prim', 'open'])
+    parser.add_argument('--planner', default='auto', choices=['auto', 'greedy', 'held-karp', 'local'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    _benchmark(args.count, args.size, args.method, args.seed, args.planner)
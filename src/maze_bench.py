@@ -0,0 +1,309 @@
+"""
+Benchmark suite for the encoder, the decoders and every MazeSolverV2 algorithm.
+Each case is timed with perf_counter_ns after warmup runs, over many repetitions,
+and reported as median / p95 / throughput. Results can be written as JSON to track regressions.
+
+Workloads are the bundled mazes plus seeded maze_generator mazes of increasing size.
+--memory instead measures the peak tracemalloc allocation of BFS, Greedy DFS and A-Star
+against a reference that copies the path into every queue entry.
+Refer to README.md for the method.
+"""
+
+
+import os
+import sys
+import json
+import time
+import tempfile
+import heapq
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+from collections import deque
+from PIL import Image
+from maze_encoderv2 import MazeInstruction
+from maze_solverv2 import MazeSolverV2, ALGORITHMS
+from maze_generator import MazeGenerator
+
+
+BUNDLED = [('maze.png', 'maze_v2.bin')]    #(Image, Bitstream) pairs relative to src
+SIZES = [31, 63, 127, 255]                   #Generated maze sizes, odd so the backtracker reaches every edge
+METHODS = ['backtracker', 'open']             #Corridor mazes and open fields (where JPS skips the most)
+WARMUP = 3
+REPEAT = 30
+MEMORY_ALGORITHMS = ['BFS', 'Greedy DFS', 'A-Star']   #Searches that rebuild legs from a parent array
+MEMORY_SCALES = [1, 4]                                #Bundled maze upscale factors for --memory
+
+
+def summarise(samples_ns, work=1):
+    """
+    Statistics of a list of nanosecond timings.
+    work is the units done per run (steps, instructions...), used for throughput.
+    """
+    samples = np.asarray(samples_ns, dtype=np.float64)
+    median = float(np.median(samples))
+    return {
+        'runs': len(samples),
+        'min_ns': int(samples.min()),
+        'median_ns': int(median),
+        'p95_ns': int(np.percentile(samples, 95)),
+        'mean_ns': int(samples.mean()),
+        'stdev_ns': int(samples.std()),
+        'work': work,
+        'throughput_per_s': work / (median / 1e9) if median else 0.0
+    }
+
+
+def measure(fn, warmup=WARMUP, repeat=REPEAT, setup=None):
+    """
+    Calls fn warmup times untimed, then repeat times timed. Returns nanosecond samples.
+    With setup, every call is fn(setup()) and only fn is timed.
+    """
+    call = (lambda: fn(setup())) if setup else fn
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter_ns()
+        fn(arg) if setup else fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def workloads(tmp, sizes, seed, methods=METHODS):
+    """[(Name, PNG Path, BIN Path)] for the bundled mazes and one generated maze per size and method"""
+
+    src = os.path.dirname(os.path.abspath(__file__))
+    cases = [(f"bundled {png}", os.path.join(src, png), os.path.join(src, bin_)) for png, bin_ in BUNDLED]
+    for size in sizes:
+        for method in methods:
+            png = os.path.join(tmp, f"{method}_{size}.png")
+            bin_ = os.path.join(tmp, f"{method}_{size}.bin")
+            generator = MazeGenerator(size, size, seed)
+            generator.save(png, method=method, gems=4, monsters=0, hearts=0)
+            MazeInstruction(png).generate_bitstream(bin_)
+            cases.append((f"{method} {size}x{size}", png, bin_))
+    return cases
+
+
+def bench_encoder(png, engine, warmup, repeat):
+    """Encodes png from an already loaded image, throughput in instructions per second"""
+
+    encoder = MazeInstruction(png)
+
+    def run():
+        encoder.bitstream = []
+        encoder.encode(engine)
+
+    samples = measure(run, warmup, repeat)
+    return summarise(samples, len(encoder.bitstream))
+
+
+def bench_solver(solver, name, warmup, repeat):
+    """Runs one algorithm headless from a fresh tracker, built outside the timing, throughput in steps per second"""
+
+    last = []
+
+    def run(tracker):
+        while not tracker[4]:
+            solver._step(name, tracker)
+        last[:] = [tracker]
+
+    samples = measure(run, warmup, repeat, setup=lambda: solver._init_trackers([name])[name])
+    tracker = last[0]
+    stats = summarise(samples, tracker[6])
+    stats['path_length'] = len(tracker[1])
+    return stats
+
+
+def copy_paths(solver, name):
+    """
+    Reference for the memory benchmark: BFS, Greedy DFS or A-Star visiting cells in the same
+    order as MazeSolverV2, but with every queue entry carrying its own copy of the path
+    (path + [n]) instead of a parent array. Returns the path over every goal.
+    """
+    cells, offsets, stride = solver.grid.cells, solver.grid.offsets, solver.grid.stride
+    goals, goal_cells = solver.goal_ids, solver.goal_cells
+    target = 0
+
+    def leg(cell, path):
+        visited = solver.grid.new_mask()
+        visited[cell] = 1
+        if name != 'A-Star':
+            return visited, deque([(cell, path)]), None
+        g = solver._new_parents()
+        g[cell] = 0
+        return visited, [(solver._manhattan(cell, goals[target]), cell, path)], g
+
+    cell = solver.grid.index(*solver.start_pos)
+    visited, queue, g = leg(cell, [cell])
+    while True:
+        match name:
+            case 'BFS':
+                cell, path = queue.popleft()
+            case 'Greedy DFS':
+                cell, path = queue.pop()
+            case 'A-Star':
+                _, cell, path = heapq.heappop(queue)
+        if cell in goal_cells and cell in goals[target:]:
+            target = goals.index(cell, target) + 1
+            if target == len(goals):
+                return path
+            visited, queue, g = leg(cell, path)
+
+        ty, tx = divmod(goals[target], stride)
+        match name:
+            case 'BFS':
+                for offset in offsets:
+                    n = cell + offset
+                    if not cells[n] and not visited[n]:
+                        visited[n] = 1
+                        queue.append((n, path + [n]))
+            case 'Greedy DFS':
+                neighbors = [cell + offset for offset in offsets if not cells[cell + offset] and not visited[cell + offset]]
+                neighbors.sort(key=lambda n: abs(n // stride - ty) + abs(n % stride - tx), reverse=True)
+                for n in neighbors:
+                    visited[n] = 1
+                    queue.append((n, path + [n]))
+            case 'A-Star':
+                new_g = g[cell] + 1
+                for offset in offsets:
+                    n = cell + offset
+                    if not cells[n] and (g[n] == -1 or new_g < g[n]):
+                        g[n] = new_g
+                        visited[n] = 1
+                        ny, nx = divmod(n, stride)
+                        heapq.heappush(queue, (new_g + abs(nx - tx) + abs(ny - ty), n, path + [n]))
+
+
+def peak_memory(fn):
+    """(Result, Peak traced bytes) of fn()"""
+
+    tracemalloc.start()
+    try:
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def run_memory(scales=MEMORY_SCALES, algorithms=None):
+    """
+    Peak allocation of solve_maze(render=False) per algorithm against copy_paths, on the bundled
+    maze upscaled by each factor (nearest neighbour, re-encoded). Both must return the same path.
+    Returns {'meta': {...}, 'results': [{'workload', 'case', 'path_copies_bytes', 'parent_array_bytes'}]}
+    """
+    src = os.path.dirname(os.path.abspath(__file__))
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'scales': scales},
+        'results': []
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for png, bin_ in BUNDLED:
+            for scale in scales:
+                workload = bin_
+                if scale != 1:
+                    img = Image.open(os.path.join(src, png))
+                    img.resize((img.width * scale, img.height * scale), Image.NEAREST).save(os.path.join(tmp, png))
+                    MazeInstruction(os.path.join(tmp, png)).generate_bitstream(os.path.join(tmp, bin_))
+                    workload = f"{png} upscaled {scale}x"
+                solver = MazeSolverV2(os.path.join(tmp if scale != 1 else src, bin_))
+                solver.solve_maze(render=False, algorithms=['BFS'])    #Plans the route and warms the caches
+                for name in algorithms or MEMORY_ALGORITHMS:
+                    results, peak = peak_memory(lambda: solver.solve_maze(render=False, algorithms=[name]))
+                    path, copies = peak_memory(lambda: copy_paths(solver, name))
+                    if [solver.grid.coords(cell) for cell in path] != results[name]['path']:
+                        raise AssertionError(f"{workload} {name}: copy_paths path differs from the solver")
+                    report['results'].append({
+                        'workload': f"{workload} ({solver.width}x{solver.height})",
+                        'case': name,
+                        'path_copies_bytes': copies,
+                        'parent_array_bytes': peak
+                    })
+    return report
+
+
+def run_suite(sizes=SIZES, warmup=WARMUP, repeat=REPEAT, seed=0, algorithms=None):
+    """
+    Runs every case and returns the report:
+    {'meta': {...}, 'results': [{'workload', 'case', <summarise() fields>}]}
+    """
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'warmup': warmup,
+            'repeat': repeat,
+            'seed': seed,
+            'timer': 'perf_counter_ns'
+        },
+        'results': []
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for workload, png, bin_ in workloads(tmp, sizes, seed):
+            engines = ['numpy', 'pixel'] if workload.startswith('bundled') else ['numpy']
+            for engine in engines:
+                stats = bench_encoder(png, engine, warmup, repeat)
+                report['results'].append({'workload': workload, 'case': f"encode {engine}", **stats})
+
+            count = os.path.getsize(bin_) // 4
+            for case, index in [('decode struct', None), ('decode mmap', 0)]:
+                samples = measure(lambda: MazeSolverV2(bin_, index=index), warmup, repeat)
+                report['results'].append({'workload': workload, 'case': case, **summarise(samples, count)})
+
+            solver = MazeSolverV2(bin_)
+            solver._get_path()
+            for name in algorithms or ALGORITHMS:
+                stats = bench_solver(solver, name, warmup, repeat)
+                report['results'].append({'workload': workload, 'case': name, **stats})
+    return report
+
+
+def print_report(report):
+    """Markdown table of a run_suite report"""
+
+    print("| Workload | Case | Median (us) | p95 (us) | Throughput (/s) | Work |")
+    print("| --- | --- | --- | --- | --- | --- |")
+    for r in report['results']:
+        print(f"| {r['workload']} | {r['case']} | {r['median_ns']/1e3:.1f} | {r['p95_ns']/1e3:.1f} | "
+            f"{r['throughput_per_s']:,.0f} | {r['work']} |")
+
+
+def print_memory(report):
+    """Markdown table of a run_memory report"""
+
+    print("| Workload | Case | Per-node path copies (KiB) | Parent array (KiB) |")
+    print("| --- | --- | --- | --- |")
+    for r in report['results']:
+        print(f"| {r['workload']} | {r['case']} | {r['path_copies_bytes']/1024:.1f} | {r['parent_array_bytes']/1024:.1f} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the encoder, decoders and solver algorithms.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=SIZES, help="Generated maze sizes")
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--algorithms', nargs='*', help="Solver titles to run (default: all)")
+    parser.add_argument('--json', help="Also write the report to this path, '-' for stdout only")
+    parser.add_argument('--memory', action='store_true', help="Peak allocation of the parent array searches instead of timings")
+    parser.add_argument('--scales', type=int, nargs='*', default=MEMORY_SCALES, help="Bundled maze upscale factors for --memory")
+    args = parser.parse_args()
+
+    if args.memory:
+        report = run_memory(args.scales, args.algorithms)
+    else:
+        report = run_suite(args.sizes, args.warmup, args.repeat, args.seed, args.algorithms)
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        (print_memory if args.memory else print_report)(report)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,174 @@
+"""
+Bit-parallel BFS on a MazeGrid.
+Open cells are Python integers with one bit per cell id, in the grid's own row major layout,
+so every row is a run of bits and the wall border stops shifts wrapping. A whole BFS
+wavefront advances with four shifts, ORs and masks per band of rows it touches.
+
+Run directly to benchmark against the per-cell MazePlanner BFS.
+Refer to README.md for the method.
+"""
+
+
+import time
+import argparse
+import numpy as np
+from array import array
+
+
+BAND = 32    #Rows per integer, bounds the work per layer to the bands the wavefront touches
+
+
+class BitBoard:
+    """
+    Walls, frontier and visited set of a MazeGrid as integers, one per band of BAND rows.
+    Cell id i is bit i % width of band i // width, with width = BAND * stride bits.
+    """
+
+    def __init__(self, grid, band=BAND):
+        """Packs the open cells of grid, walls are 0 bits"""
+
+        self.grid = grid
+        self.stride = grid.stride
+        self.width = band * grid.stride
+        self.count = -(-grid.size // self.width)
+        self.open = self.pack(np.flatnonzero(np.frombuffer(grid.cells, dtype=np.uint8) == 0))
+
+    def pack(self, ids):
+        """One integer per band with the bits of cell ids set"""
+
+        bits = np.zeros(self.count * self.width, dtype=bool)
+        bits[np.asarray(ids, dtype=np.int64)] = True
+        return [int.from_bytes(np.packbits(row, bitorder='little').tobytes(), 'little')
+            for row in bits.reshape(self.count, self.width)]
+
+    def unpack(self, band, bits):
+        """Cell ids of the set bits of one band, ascending"""
+
+        raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little')) + band * self.width
+
+    def layers(self, source):
+        """
+        Yields the BFS wavefront of each distance from source as {band: bits}, layer d holds
+        every cell exactly d moves away. Only bands holding part of the wavefront are touched.
+        Stops when the reachable area is exhausted.
+        """
+        stride, width, last = self.stride, self.width, self.count - 1
+        top = width - stride        #Bit offset of the last row of a band
+        first_row = (1 << stride) - 1
+        unseen = self.open[:]
+        band, bit = divmod(source, width)
+        frontier = {band: 1 << bit}
+        unseen[band] &= ~(1 << bit)
+        while frontier:
+            yield frontier
+            spread = {}
+            for band, f in frontier.items():
+                spread[band] = spread.get(band, 0) | (f << 1) | (f >> 1) | (f << stride) | (f >> stride)
+                if band < last and f >> top:
+                    spread[band + 1] = spread.get(band + 1, 0) | (f >> top)
+                if band and f & first_row:
+                    spread[band - 1] = spread.get(band - 1, 0) | ((f & first_row) << top)
+            frontier = {}
+            for band, f in spread.items():
+                f &= unseen[band]
+                if f:
+                    unseen[band] ^= f
+                    frontier[band] = f
+
+    def distances(self, source, targets):
+        """Shortest path length from source to each target cell id, -1 if unreachable"""
+
+        found = [-1] * len(targets)
+        wanted = {}
+        for i, t in enumerate(targets):
+            band, bit = divmod(t, self.width)
+            wanted.setdefault(band, []).append((bit, i))
+        left = len(targets)
+        for d, frontier in enumerate(self.layers(source)):
+            for band in wanted.keys() & frontier.keys():
+                f = frontier[band]
+                for bit, i in wanted[band]:
+                    if found[i] == -1 and f >> bit & 1:
+                        found[i] = d
+                        left -= 1
+            if not left:
+                break
+        return found
+
+    def distance_map(self, source):
+        """Distance from source to every cell id, -1 where unreachable, same as MazePlanner.bfs"""
+
+        dist = np.full(self.count * self.width, -1, dtype=np.int32)
+        for d, frontier in enumerate(self.layers(source)):
+            for band, f in frontier.items():
+                dist[self.unpack(band, f)] = d
+        return array('i', dist[:self.grid.size].tobytes())
+
+    def path(self, source, target):
+        """
+        Shortest path as cell ids from source to target inclusive, None if unreachable.
+        Each layer is kept as cell id -> membership test, then the path is walked back
+        from target, picking any neighbour in the previous layer.
+        """
+        width = self.width
+        band, bit = divmod(target, width)
+        history = []
+        for frontier in self.layers(source):
+            history.append(frontier.copy())
+            if frontier.get(band, 0) >> bit & 1:
+                break
+        else:
+            return None
+
+        path = [target]
+        for frontier in reversed(history[:-1]):
+            cell = path[-1]
+            for offset in self.grid.offsets:
+                band, bit = divmod(cell + offset, width)
+                if frontier.get(band, 0) >> bit & 1:
+                    path.append(cell + offset)
+                    break
+        path.reverse()
+        return path
+
+
+def _benchmark(sizes, methods, seed, queries):
+    """Times all pairs distances from the start point against the per-cell BFS of MazePlanner"""
+
+    from maze_generator import MazeGenerator
+    from maze_decoder import decode
+    from maze_planner import MazePlanner
+
+    print("| Maze | Layers | Planner BFS (ms) | BitBoard (ms) | Speedup |")
+    print("| --- | --- | --- | --- | --- |")
+    for method in methods:
+        for size in sizes:
+            data = MazeGenerator(size, size, seed).encode(method=method, gems=queries, monsters=0, hearts=0)
+            grid, start, end, entities = decode(np.frombuffer(data, dtype='>u4'))
+            source = grid.index(*start)
+            targets = [grid.index(*p) for p in entities['gems'] + [end]]
+
+            t0 = time.perf_counter()
+            dist = MazePlanner(grid).bfs(source)
+            expected = [dist[t] for t in targets]
+            planner_time = time.perf_counter() - t0
+
+            board = BitBoard(grid)
+            t0 = time.perf_counter()
+            found = board.distances(source, targets)
+            board_time = time.perf_counter() - t0
+            if found != expected:
+                raise AssertionError(f"{method} {size}: {found} != {expected}")
+            layers = max(found) + 1
+            print(f"| {method} {size}x{size} | {layers} | {planner_time*1000:.2f} | {board_time*1000:.2f} | {planner_time / board_time:.1f}x |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bit-parallel BFS against the per-cell BFS.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[63, 255, 1023])
+    parser.add_argument('--methods', nargs='*', default=['open', 'prim', 'backtracker'])
+    parser.add_argument('--queries', type=int, default=8, help="Gems to measure distances to, plus the end point")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    _benchmark(args.sizes, args.methods, args.seed, args.queries)
@@ -0,0 +1,153 @@
+"""
+Memoised leg paths for MazeSolverV2.
+Keyed by the maze layout digest, the kind of path and the (source, target) cell pair,
+so repeated solves of the same level with other starts or objective subsets skip the search
+for every leg they have in common.
+
+Run directly to check that cached solves return the same paths as uncached ones.
+Refer to README.md for details.
+"""
+
+
+import os
+import sqlite3
+import argparse
+import tempfile
+from array import array
+from collections import OrderedDict
+
+
+CACHE_SIZE = 4096    #Legs kept in memory
+
+
+class PathCache:
+    """
+    In memory LRU of leg paths (lists of MazeGrid cell ids), bounded to size entries.
+    With path set, entries are also written through to a local SQLite file and misses
+    fall back to it, so the cache survives between processes.
+    """
+
+    def __init__(self, size=CACHE_SIZE, path=None):
+        """size bounds the in memory entries, path is the optional on-disk store"""
+
+        self.size = size
+        self.path = path
+        self.entries = OrderedDict()
+        self.db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        """Worker processes get the entries and counters, they reopen the store themselves"""
+
+        state = self.__dict__.copy()
+        state['db'] = None
+        return state
+
+    def _store(self):
+        """SQLite connection, opened on first use"""
+
+        if self.db is None:
+            self.db = sqlite3.connect(self.path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS legs (key TEXT PRIMARY KEY, path BLOB)")
+        return self.db
+
+    def _remember(self, key, path):
+        """Inserts into the LRU, evicting the least recently used entry when full"""
+
+        self.entries[key] = path
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Cached path for key or None, counted as a hit or a miss"""
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.path:
+            row = self._store().execute("SELECT path FROM legs WHERE key = ?", (repr(key),)).fetchone()
+            if row:
+                path = array('i', row[0]).tolist()
+                self._remember(key, path)
+                self.hits += 1
+                self.disk_hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    def put(self, key, path):
+        """Stores a leg path, written through to the on-disk store if there is one"""
+
+        self._remember(key, list(path))
+        if self.path:
+            db = self._store()
+            db.execute("INSERT OR REPLACE INTO legs VALUES (?, ?)", (repr(key), array('i', path).tobytes()))
+            db.commit()
+
+    def stats(self):
+        """Counters for sizing the cache"""
+
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'size': self.size,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """Closes the on-disk store, the in memory entries stay usable"""
+
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def _check(count, size, method, seed):
+    """
+    Solves seeded mazes uncached, then fills one cache with every algorithm under every planner
+    and solves again from it. Raises AssertionError if any cached path differs.
+    """
+    from maze_generator import MazeGenerator
+    from maze_solverv2 import MazeSolverV2, ALGORITHMS
+
+    planners = ['auto', 'greedy', 'local']
+    print("| Maze | Algorithm | Path Length | Cached Legs | Same Path |")
+    print("| --- | --- | --- | --- | --- |")
+    with tempfile.TemporaryDirectory() as tmp:
+        generator = MazeGenerator(size, size, seed)
+        for n in range(count):
+            path = os.path.join(tmp, f"maze_{n}.bin")
+            generator.save(path, method=method, gems=8, monsters=4, hearts=2)
+            expected = {planner: MazeSolverV2(path, planner=planner).solve_maze(render=False) for planner in planners}
+            cache = PathCache()
+            for planner in planners:
+                MazeSolverV2(path, planner=planner, cache=cache).solve_maze(render=False)
+            for planner in planners:
+                results = MazeSolverV2(path, planner=planner, cache=cache).solve_maze(render=False)
+                for name in ALGORITHMS:
+                    same = results[name]['path'] == expected[planner][name]['path']
+                    if planner == 'auto':
+                        print(f"| {method} {size}x{size} #{n} | {name} | {len(results[name]['path'])} | "
+                            f"{results[name]['cached_legs']} | {same} |")
+                    if not same:
+                        raise AssertionError(f"Maze {n}, {planner} planner: cached {name} path differs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check cached solves against uncached ones.")
+    parser.add_argument('-n', '--count', type=int, default=6, help="Number of mazes")
+    parser.add_argument('--size', type=int, default=41)
+    parser.add_argument('--method', default='prim', choices=['backtracker', 'prim', 'open'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    _check(args.count, args.size, args.method, args.seed)
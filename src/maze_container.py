@@ -0,0 +1,127 @@
+"""
+Indexed container for many encoded mazes in one file (.mzc).
+Mazes are streamed in one after another and a fixed size index entry per maze is written
+at the end, so maze N is found with one seek instead of parsing every instruction before it.
+
+Layout (big-endian):
+HEADER  b'MZC1', VERSION u16, RESERVED u16, COUNT u32, INDEX OFFSET u64
+MAZES   instruction streams, unchanged
+INDEX   COUNT x (OFFSET u64, LENGTH u32, WIDTH u16, HEIGHT u16, GEMS u16, MONSTERS u16, HEARTS u16, RESERVED u16)
+
+Refer to README.md for details.
+"""
+
+
+import mmap
+import struct
+import numpy as np
+from maze_decoder import MazeArchive, decode
+
+
+MAGIC = b'MZC1'
+VERSION = 1
+HEADER = struct.Struct('>4sHHIQ')
+ENTRY = struct.Struct('>QIHHHHHH')
+ENTRY_DTYPE = np.dtype([
+    ('offset', '>u8'), ('length', '>u4'), ('width', '>u2'), ('height', '>u2'),
+    ('gems', '>u2'), ('monsters', '>u2'), ('hearts', '>u2'), ('reserved', '>u2')
+])
+
+
+class ContainerWriter:
+    """
+    Appends encoded mazes to a container as they arrive.
+    Only the index entries are held in memory, the header is patched on close.
+    """
+
+    def __init__(self, path):
+        """Opens path and reserves the header"""
+
+        self.fp = open(path, "wb")
+        self.fp.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        self.entries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, data):
+        """Writes one instruction stream (bytes from MazeInstruction.encode), returns its maze number"""
+
+        grid, _, _, entities = decode(np.frombuffer(data, dtype='>u4'))
+        self.entries.append(ENTRY.pack(
+            self.fp.tell(), len(data) // 4, grid.width, grid.height,
+            len(entities['gems']), len(entities['monsters']), len(entities['hearts']), 0
+        ))
+        self.fp.write(data)
+        return len(self.entries) - 1
+
+    def close(self):
+        """Writes the index and fills in the header"""
+
+        if self.fp.closed:
+            return
+        index_offset = self.fp.tell()
+        self.fp.write(b''.join(self.entries))
+        self.fp.seek(0)
+        self.fp.write(HEADER.pack(MAGIC, VERSION, 0, len(self.entries), index_offset))
+        self.fp.close()
+
+
+class MazeContainer:
+    """
+    Read only, memory mapped access to a container. Same interface as MazeArchive:
+    container[n] returns (MazeGrid, Start Point, End Point, {'gems', 'monsters', 'hearts'}).
+    """
+
+    def __init__(self, path):
+        """Maps path and views the index in place"""
+
+        self.fp = open(path, "rb")
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, index_offset = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} maze container")
+        self.index = np.frombuffer(self.mm, dtype=ENTRY_DTYPE, count=count, offset=index_offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Releases the index view before unmapping"""
+
+        self.index = None
+        self.mm.close()
+        self.fp.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def meta(self, n):
+        """Index entry of maze n as a dict"""
+
+        entry = self.index[n]
+        return {name: int(entry[name]) for name in ENTRY_DTYPE.names if name != 'reserved'}
+
+    def instructions(self, n):
+        """Zero copy view of the instructions of maze n"""
+
+        entry = self.index[n]
+        return np.frombuffer(self.mm, dtype='>u4', count=int(entry['length']), offset=int(entry['offset']))
+
+    def __getitem__(self, n):
+        return decode(self.instructions(n))
+
+
+def open_archive(path):
+    """MazeContainer for .mzc files, MazeArchive for plain or concatenated .bin streams"""
+
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    return MazeContainer(path) if magic == MAGIC else MazeArchive(path)
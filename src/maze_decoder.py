@@ -0,0 +1,222 @@
+"""
+Memory mapped decoder for instruction archives (many .bin streams concatenated, see maze_encoderv2 -a).
+The file is viewed as a big-endian uint32 NumPy array without copying, and each maze
+is decoded with vectorised masks and shifts instead of a per-instruction match.
+
+Maze boundaries are found lazily, so opening a large archive and reading maze N only
+scans up to maze N. Refer to README.md for the boundary rules.
+"""
+
+
+import mmap
+import numpy as np
+from maze_grid import MazeGrid
+
+
+SCAN_CHUNK = 1 << 16    #Instructions scanned per boundary search step
+
+#Opcodes, see MazeInstruction
+BUILD_WALL, PLACE_ENT, MAZE_HEADER, SET_ROW, BUILD_WALL_SEG, PLACE_ENT_EXT, END_MAZE = 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0xF
+WALL_RUNS, WALL_RUN_LONG = 0x7, 0x8
+VERSION_RLE, VERSION_RLE_XOR = 0x2, 0x3
+
+
+class MazeArchive:
+    """
+    Random access to the mazes of an instruction archive.
+    A legacy maze ends with its row 29 right half BUILD_WALL, an extended maze with END_MAZE.
+    archive[n] returns (MazeGrid, Start Point, End Point, {'gems', 'monsters', 'hearts'}).
+    """
+
+    def __init__(self, path):
+        """Maps path read only, nothing is decoded yet"""
+
+        self.fp = open(path, "rb")
+        size = self.fp.seek(0, 2)
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.words = np.frombuffer(self.mm, dtype='>u4', count=size // 4)
+        #Bounds: instruction index where each maze starts, plus the end of the last one found
+        self.bounds = [0]
+        self.scanned = 0
+        self.depth = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Releases the view before unmapping, the mmap refuses to close while exported"""
+
+        self.words = None
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.fp.close()
+
+    def _scan(self):
+        """Finds the maze ends in the next SCAN_CHUNK instructions, False once the archive is exhausted"""
+
+        words = self.words
+        if self.scanned >= len(words):
+            if self.bounds[-1] < len(words):
+                self.bounds.append(len(words))   #Unterminated tail counts as one maze
+            return False
+
+        chunk = words[self.scanned:self.scanned + SCAN_CHUNK]
+        opcode = chunk & 0xF
+        is_header = opcode == MAZE_HEADER
+        is_end = opcode == END_MAZE
+        #Depth before each instruction: > 0 inside a MAZE_HEADER ... END_MAZE block
+        delta = is_header.astype(np.int64) - is_end
+        depth = self.depth + np.cumsum(delta) - delta
+        legacy_end = (opcode == BUILD_WALL) & (depth == 0) & (((chunk >> 4) & 0xFF) == 29) & (((chunk >> 12) & 0xF) != 0)
+
+        ends = np.flatnonzero(is_end | legacy_end) + self.scanned + 1
+        self.bounds += ends.tolist()
+        self.depth = max(0, int(depth[-1] + delta[-1]))
+        self.scanned += len(chunk)
+        return True
+
+    def _find(self, n):
+        """Scans until maze n is bounded, IndexError past the last maze"""
+
+        while len(self.bounds) <= n + 1:
+            if not self._scan():
+                raise IndexError(f"Archive has {len(self.bounds) - 1} mazes, no maze {n}")
+
+    def __len__(self):
+        """Number of mazes, scans the whole archive"""
+
+        while self._scan():
+            pass
+        return len(self.bounds) - 1
+
+    def instructions(self, n):
+        """Zero copy view of the instructions of maze n"""
+
+        if n < 0:
+            n += len(self)
+        self._find(n)
+        return self.words[self.bounds[n]:self.bounds[n + 1]]
+
+    def __getitem__(self, n):
+        return decode(self.instructions(n))
+
+
+def _place_walls(grid, ys, xs, bits):
+    """Sets every wall bit (rows of bits against per-column xs) inside the maze"""
+
+    ys = np.broadcast_to(ys[:, None], bits.shape)[bits]
+    xs = np.broadcast_to(xs, bits.shape)[bits]
+    keep = (xs < grid.width) & (ys < grid.height)
+    inner = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height + 2, grid.stride)[1:-1, 1:-1]
+    inner[ys[keep], xs[keep]] = 1
+
+
+def _place_runs(grid, instrs, xor):
+    """
+    Expands WALL_RUNS / WALL_RUN_LONG into the wall grid.
+    Every field toggles the run value, a WALL_RUN_LONG field sets it, so the value of a field
+    is its anchor's (the latest WALL_RUN_LONG, or a virtual 1 before the first field) XOR
+    the parity of the distance to it.
+    """
+    long = (instrs & 0xF) == WALL_RUN_LONG
+    #One row of 9 fields per instruction, a WALL_RUN_LONG only uses its first
+    shifts = (29 - 3 * np.arange(9, dtype=np.uint32))
+    lengths = ((instrs[:, None] >> shifts) & 0x7).astype(np.int64)
+    lengths[long, 0] = instrs[long] >> 5
+    used = np.ones(lengths.shape, dtype=bool)
+    used[long, 1:] = False
+    lengths = lengths[used]
+    explicit = np.full(used.shape, -1, dtype=np.int64)
+    explicit[long, 0] = (instrs[long] >> 4) & 1
+    explicit = explicit[used]
+
+    index = np.arange(len(lengths))
+    anchor = np.maximum.accumulate(np.where(explicit >= 0, index, -1))
+    anchor_value = np.where(anchor >= 0, explicit[np.maximum(anchor, 0)], 1)
+    values = (anchor_value ^ ((index - anchor) & 1)).astype(np.uint8)
+
+    cells = grid.width * grid.height
+    ends = np.minimum(np.cumsum(lengths), cells)
+    lengths = np.diff(np.concatenate([[0], ends]))
+    bits = np.zeros(cells, dtype=np.uint8)
+    filled = np.repeat(values, lengths)
+    bits[:len(filled)] = filled
+    walls = bits.reshape(grid.height, grid.width)
+    if xor:
+        walls = np.bitwise_xor.accumulate(walls, axis=0)
+    inner = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.height + 2, grid.stride)[1:-1, 1:-1]
+    inner |= walls
+
+
+def decode(instrs):
+    """
+    Decodes one maze from a uint32 array, same result as MazeSolverV2._parse_bin.
+    Returns (MazeGrid, Start Point, End Point, {'gems', 'monsters', 'hearts'}).
+    """
+    instrs = np.asarray(instrs, dtype=np.uint32)
+    opcode = instrs & 0xF
+
+    #Instructions after END_MAZE are ignored
+    stop = np.flatnonzero(opcode == END_MAZE)
+    if len(stop):
+        instrs, opcode = instrs[:stop[0]], opcode[:stop[0]]
+
+    #The last MAZE_HEADER sizes the grid and discards walls built before it
+    headers = np.flatnonzero(opcode == MAZE_HEADER)
+    width, height, version = 30, 30, 0
+    after = np.ones(len(instrs), dtype=bool)
+    if len(headers):
+        h = int(instrs[headers[-1]])
+        width, height, version = (h >> 20) & 0xFFF, (h >> 8) & 0xFFF, (h >> 4) & 0xF
+        after[:headers[-1]] = False
+    grid = MazeGrid(width, height)
+
+    #Extended: each instruction applies to the row of the latest SET_ROW (0 before any)
+    is_row = opcode == SET_ROW
+    set_rows = np.concatenate([[0], (instrs[is_row] >> 16) & 0xFFFF])
+    row = set_rows[np.cumsum(is_row)]
+
+    walls = instrs[(opcode == BUILD_WALL) & after]
+    if len(walls):
+        bits = ((walls[:, None] >> (16 + 14 - np.arange(15, dtype=np.uint32))) & 1).astype(bool)
+        xs = np.arange(15) + np.where(((walls >> 12) & 0xF) == 0, 0, 15)[:, None]
+        _place_walls(grid, (walls >> 4) & 0xFF, xs, bits)
+
+    segs = (opcode == BUILD_WALL_SEG) & after
+    if segs.any():
+        seg = instrs[segs]
+        bits = ((seg[:, None] >> (16 + 15 - np.arange(16, dtype=np.uint32))) & 1).astype(bool)
+        xs = ((seg >> 4) & 0xFFF)[:, None] * 16 + np.arange(16)
+        _place_walls(grid, row[segs], xs, bits)
+
+    runs = ((opcode == WALL_RUNS) | (opcode == WALL_RUN_LONG)) & after
+    if len(headers) and runs.any():
+        _place_runs(grid, instrs[runs], version == VERSION_RLE_XOR)
+
+    #Entities keep instruction order, so list order matches the reference decoder
+    legacy = opcode == PLACE_ENT
+    ents = legacy | (opcode == PLACE_ENT_EXT)
+    e = instrs[ents]
+    xs = np.where(legacy[ents], (e >> 16) & 0xFF, (e >> 16) & 0xFFFF).tolist()
+    ys = np.where(legacy[ents], (e >> 24) & 0xFF, row[ents]).tolist()
+    funct1 = ((e >> 12) & 0xF).tolist()
+    funct2 = ((e >> 8) & 0xF).tolist()
+
+    start_pos = end_pos = None
+    entities = {'gems': [], 'monsters': [], 'hearts': []}
+    for x, y, f1, f2 in zip(xs, ys, funct1, funct2):
+        match f1:
+            case 0x1 if f2 == 0x1:
+                start_pos = (x, y)
+            case 0x1 if f2 == 0x2:
+                end_pos = (x, y)
+            case 0x2:
+                entities['hearts'].append((x, y))
+            case 0x4:
+                entities['gems'].append((x, y))
+            case 0x8:
+                entities['monsters'].append((x, y))
+    return grid, start_pos, end_pos, entities
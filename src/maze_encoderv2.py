@@ -1,13 +1,23 @@
 """
 Encodes a 30x30 pixel image into bitstream following custom 32-bit instruction set.
+Other sizes (up to 4095x4095) use the extended V1 instructions behind a MAZE_HEADER.
+Whole directories can be batch encoded across a process pool from the command line,
+into single files, a concatenated archive or an indexed maze_container.
 
 Refer to SETUP.md for usage.
 """
 
 
 import os
+import sys
+import glob
+import time
 import struct
+import argparse
+import multiprocessing
+import numpy as np
 from PIL import Image
+from maze_container import ContainerWriter
 
 
 IMAGE_PATH = 'maze.png'
@@ -21,6 +31,28 @@ class MazeInstruction:
     BUILD_WALL = 0x1
     PLACE_ENT = 0x2
 
+    #OPCODES (EXTENDED V1)
+    MAZE_HEADER = 0x3
+    SET_ROW = 0x4
+    BUILD_WALL_SEG = 0x5
+    PLACE_ENT_EXT = 0x6
+    END_MAZE = 0xF
+
+    #OPCODES (RUN LENGTH)
+    WALL_RUNS = 0x7
+    WALL_RUN_LONG = 0x8
+
+    #MAZE_HEADER VERSION
+    VERSION_EXT = 0x1
+    VERSION_RLE = 0x2       #Runs over the walls, row major
+    VERSION_RLE_XOR = 0x3   #Runs over each row XOR the row above
+    MAX_DIM = 0xFFF
+
+    #WALL_RUNS packing
+    RUN_BITS = 3
+    RUNS_PER_INSTR = 9
+    MAX_RUN = (1 << RUN_BITS) - 1
+
     #ENTITY (RGB)
     STARTPOINT = (0, 183, 239)
     ENDPOINT = (237, 28, 36)
@@ -46,13 +78,14 @@ class MazeInstruction:
     WEST = 0x8
 
 
-    def __init__(self, path=IMAGE_PATH):
-        """Init Read Write"""
+    def __init__(self, path=IMAGE_PATH, image=None):
+        """Init Read Write, image takes an in memory PIL image instead of reading path"""
 
         self.bitstream = []
         self.script_dir = os.path.dirname(__file__)
         self.image_path = os.path.join(self.script_dir, path)
-        self.img = Image.open(self.image_path).convert('RGB')
+        self.img = (image if image is not None else Image.open(self.image_path)).convert('RGB')
+        self.pixels = np.asarray(self.img)
     
     def _gen_wall(self, x, y):
         """Generate Walls if Black, logs L/R half"""
@@ -129,10 +162,9 @@ class MazeInstruction:
         if instr:
             self.bitstream.append(instr)
 
-    def generate_bitstream(self, path=BITSTREAM_PATH):
-        """Main function for bitstream generation"""
+    def _gen_bitstream_pixel(self):
+        """Reference engine, one getpixel per cell"""
 
-        self.bin_path = os.path.join(self.script_dir, path)
         for y in range(30):
             self.data_left = 0
             self.data_right = 0
@@ -143,11 +175,334 @@ class MazeInstruction:
             instr_2 = ((self.data_right) << 16) | (0xF << 12) | (y << 4) | self.BUILD_WALL
             self.bitstream.append(instr_1)
             self.bitstream.append(instr_2)
-            
-        binary_data = struct.pack(f'>{len(self.bitstream)}I', *self.bitstream)
+
+    def _gen_functs(self, px):
+        """FUNCT1/FUNCT2/FUNCT3 bits (shifted into place) per cell, 0 where empty"""
+
+        h, w = px.shape[:2]
+        funct = np.zeros((h, w), dtype=np.uint32)
+        for colour, funct1, funct2 in [
+            (self.STARTPOINT, self.SPEP_FUNCT1, self.SP_FUNCT2),
+            (self.ENDPOINT, self.SPEP_FUNCT1, self.EP_FUNCT2),
+            (self.HEART, self.HEART_FUNCT1, 0x1),
+            (self.GEM, self.GEM_FUNCT1, 0x1)
+        ]:
+            funct[np.all(px == colour, axis=2)] = (funct1 << 12) | (funct2 << 8) | (self.NORTH << 4)
+
+        #Monsters: last matching facing pixel wins, same as the pixel engine
+        facing = np.pad(np.all(px == self.MONSTER_FACING, axis=2), 1)
+        orientation = np.full((h, w), self.NORTH, dtype=np.uint32)
+        for (dx, dy), ori in [
+            ((0, -1), self.NORTH),
+            ((1, 0),  self.EAST),
+            ((0, 1),  self.SOUTH),
+            ((-1, 0), self.WEST)
+        ]:
+            orientation[facing[1+dy:h+1+dy, 1+dx:w+1+dx]] = ori
+        monster = np.all(px == self.MONSTER, axis=2)
+        funct[monster] = (self.MONSTER_FUNCT1 << 12) | (0x1 << 8) | (orientation[monster] << 4)
+        return funct
+
+    def _gen_bitstream_numpy(self):
+        """Vectorised engine, same instruction order as _gen_bitstream_pixel"""
+
+        px = self.pixels[:30, :30]
+        ys = np.arange(30, dtype=np.uint32)
+
+        #Walls: pad each 15 cell half to 16 bits, pack, then drop the pad bit
+        halves = np.zeros((30, 2, 16), dtype=bool)
+        halves[:, 0, :15] = np.all(px[:, :15] == 0, axis=2)
+        halves[:, 1, :15] = np.all(px[:, 15:] == 0, axis=2)
+        packed = np.packbits(halves, axis=2).astype(np.uint32)
+        data = ((packed[..., 0] << 8) | packed[..., 1]) >> 1
+        walls = np.stack([
+            (data[:, 0] << 16) | (0x0 << 12) | (ys << 4) | self.BUILD_WALL,
+            (data[:, 1] << 16) | (0xF << 12) | (ys << 4) | self.BUILD_WALL
+        ], axis=1)
+
+        #Row major nonzero keeps entities ordered by x within each row
+        funct = self._gen_functs(px)
+        ey, ex = np.nonzero(funct)
+        entities = (ey.astype(np.uint32) << 24) | (ex.astype(np.uint32) << 16) | funct[ey, ex] | self.PLACE_ENT
+
+        #Each row emits its entities followed by the left and right walls
+        rows = np.concatenate([ey, np.repeat(ys, 2)])
+        order = np.concatenate([ex, np.tile([30, 31], 30)])
+        instrs = np.concatenate([entities, walls.ravel()])
+        self.bitstream.extend(instrs[np.lexsort((order, rows))].tolist())
+
+    def _gen_bitstream_ext(self):
+        """
+        Extended V1 engine for any size up to MAX_DIM.
+        MAZE_HEADER, then per row: SET_ROW, PLACE_ENT_EXT by column, BUILD_WALL_SEG
+        for each 16 column segment. Closed by END_MAZE.
+        """
+        px = self.pixels
+        h, w = px.shape[:2]
+        if not (0 < w <= self.MAX_DIM and 0 < h <= self.MAX_DIM):
+            raise ValueError(f"Maze {w}x{h} exceeds {self.MAX_DIM}x{self.MAX_DIM}")
+        segs = (w + 15) // 16
+        ys = np.arange(h, dtype=np.uint32)
+
+        #Walls: pad the row to whole segments, pack to big-endian 16 bit words
+        walls = np.zeros((h, segs * 16), dtype=bool)
+        walls[:, :w] = np.all(px == 0, axis=2)
+        data = np.packbits(walls, axis=1).view('>u2').astype(np.uint32)
+        seg_idx = np.arange(segs, dtype=np.uint32)
+        wall_instrs = (data << 16) | (seg_idx << 4) | self.BUILD_WALL_SEG
+
+        funct = self._gen_functs(px)
+        ey, ex = np.nonzero(funct)
+        entities = (ex.astype(np.uint32) << 16) | funct[ey, ex] | self.PLACE_ENT_EXT
+
+        #Per row ordering: SET_ROW, entities by column, then wall segments
+        rows = np.concatenate([ys, ey, np.repeat(ys, segs)])
+        order = np.concatenate([
+            np.full(h, -1), ex, np.tile(w + seg_idx.astype(np.int64), h)
+        ])
+        instrs = np.concatenate([(ys << 16) | self.SET_ROW, entities, wall_instrs.ravel()])
+
+        header = (w << 20) | (h << 8) | (self.VERSION_EXT << 4) | self.MAZE_HEADER
+        self.bitstream.append(header)
+        self.bitstream.extend(instrs[np.lexsort((order, rows))].tolist())
+        self.bitstream.append(self.END_MAZE)
+
+    def _gen_runs(self, bits):
+        """
+        WALL_RUNS / WALL_RUN_LONG instructions for a flat bit sequence.
+        Runs alternate starting with 0. A run longer than MAX_RUN is split by zero length runs
+        of the other value, one that would take more than a whole WALL_RUNS becomes a WALL_RUN_LONG.
+        Trailing zeros are implied by the decoder and never sent.
+        """
+        nonzero = np.flatnonzero(bits)
+        if not len(nonzero):
+            return []
+        bits = bits[:nonzero[-1] + 1].astype(np.int8)
+        edges = np.flatnonzero(np.diff(bits)) + 1
+        lengths = np.diff(np.concatenate([[0], edges, [len(bits)]])).tolist()
+        if bits[0]:
+            lengths.insert(0, 0)
+
+        instrs, fields, value = [], [], 0
+        def flush():
+            #Unused fields are zero length runs, they still toggle, but a WALL_RUN_LONG or the end follows
+            data = 0
+            for i, length in enumerate(fields):
+                data |= length << (32 - self.RUN_BITS * (i + 1))
+            instrs.append(data | self.WALL_RUNS)
+            fields.clear()
+
+        for run_value, length in zip([0, 1] * len(lengths), lengths):
+            if length > self.MAX_RUN * self.RUNS_PER_INSTR:
+                if fields:
+                    flush()
+                instrs.append((length << 5) | (run_value << 4) | self.WALL_RUN_LONG)
+                value = run_value ^ 1
+                continue
+            pieces = [self.MAX_RUN, 0] * (length // self.MAX_RUN) + [length % self.MAX_RUN]
+            if length and pieces[-1] == 0:
+                pieces = pieces[:-2]
+            if value != run_value:
+                pieces.insert(0, 0)     #The runs after a WALL_RUN_LONG start on the other value
+            for piece in pieces:
+                fields.append(piece)
+                value ^= 1
+                if len(fields) == self.RUNS_PER_INSTR:
+                    flush()
+        if fields:
+            flush()
+        return instrs
+
+    def _gen_bitstream_rle(self):
+        """
+        Run length engine for any size up to MAX_DIM.
+        MAZE_HEADER, the walls as runs (plain or XOR the row above, whichever is shorter),
+        PLACE_ENT per entity (SET_ROW + PLACE_ENT_EXT past 255), then END_MAZE.
+        """
+        px = self.pixels
+        h, w = px.shape[:2]
+        if not (0 < w <= self.MAX_DIM and 0 < h <= self.MAX_DIM):
+            raise ValueError(f"Maze {w}x{h} exceeds {self.MAX_DIM}x{self.MAX_DIM}")
+
+        walls = np.all(px == 0, axis=2)
+        delta = walls.copy()
+        delta[1:] ^= walls[:-1]
+        plain, xor = self._gen_runs(walls.ravel()), self._gen_runs(delta.ravel())
+        version, runs = (self.VERSION_RLE, plain) if len(plain) <= len(xor) else (self.VERSION_RLE_XOR, xor)
+
+        funct = self._gen_functs(px)
+        entities = []
+        row = None
+        for y, x in zip(*np.nonzero(funct)):
+            y, x = int(y), int(x)
+            if x < 256 and y < 256:
+                entities.append((y << 24) | (x << 16) | int(funct[y, x]) | self.PLACE_ENT)
+                continue
+            if row != y:
+                entities.append((y << 16) | self.SET_ROW)
+                row = y
+            entities.append((x << 16) | int(funct[y, x]) | self.PLACE_ENT_EXT)
+
+        header = (w << 20) | (h << 8) | (version << 4) | self.MAZE_HEADER
+        self.bitstream += [header] + runs + entities + [self.END_MAZE]
+
+    def encode(self, engine='numpy', extended=None, compressed=False):
+        """
+        Returns the instruction stream as big-endian bytes.
+        extended=None picks the legacy format for 30x30 images and V1 otherwise.
+        compressed=True writes the run length format instead, any size.
+        """
+        if extended is None:
+            extended = self.pixels.shape[:2] != (30, 30)
+
+        match engine:
+            case 'numpy' if compressed:
+                self._gen_bitstream_rle()
+            case 'pixel' if compressed:
+                raise ValueError("Pixel engine does not support the run length format")
+            case 'numpy' if extended:
+                self._gen_bitstream_ext()
+            case 'numpy':
+                self._gen_bitstream_numpy()
+            case 'pixel' if extended:
+                raise ValueError("Pixel engine only supports the legacy 30x30 format")
+            case 'pixel':
+                self._gen_bitstream_pixel()
+            case _:
+                raise ValueError(f"Unknown engine: {engine}")
+
+        return struct.pack(f'>{len(self.bitstream)}I', *self.bitstream)
+
+    def generate_bitstream(self, path=BITSTREAM_PATH, engine='numpy', extended=None, compressed=False):
+        """Main function for bitstream generation"""
+
+        self.bin_path = os.path.join(self.script_dir, path)
+        binary_data = self.encode(engine, extended, compressed)
         with open(self.bin_path, "wb") as f:
             f.write(binary_data)
 
+
+def _encode_file(job):
+    """Pool worker, never raises so one bad image cannot abort the batch"""
+
+    src, dst, engine, extended, compressed = job
+    t0 = time.perf_counter()
+    try:
+        data = MazeInstruction(src).encode(engine, extended, compressed)
+        if dst:
+            with open(dst, "wb") as f:
+                f.write(data)
+            data = len(data)
+    except Exception as e:
+        return src, dst, None, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+    return src, dst, data, time.perf_counter() - t0, None
+
+
+def _collect_images(inputs):
+    """Expands directories and glob patterns into a sorted list of PNG paths"""
+
+    images = []
+    for item in inputs:
+        if os.path.isdir(item):
+            images += glob.glob(os.path.join(item, '*.png'))
+        else:
+            images += glob.glob(item)
+    return sorted({os.path.abspath(p) for p in images})
+
+
+def batch_encode(inputs, out_dir=None, archive=None, jobs=None, engine='numpy', extended=None, container=None, compressed=False):
+    """
+    Encodes every PNG matched by inputs across a process pool.
+    Each image is written to out_dir (or beside the image) as <name>.bin,
+    or appended in sorted order to a single archive file,
+    or streamed in sorted order into an indexed container (.mzc).
+
+    Returns (succeeded, failed) as lists of paths.
+    """
+    images = _collect_images(inputs)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    work = []
+    for src in images:
+        dst = None
+        if not (archive or container):
+            name = os.path.splitext(os.path.basename(src))[0] + '.bin'
+            dst = os.path.join(out_dir or os.path.dirname(src), name)
+        work.append((src, dst, engine, extended, compressed))
+
+    succeeded, failed = [], []
+    t_start = time.perf_counter()
+    out = ContainerWriter(container) if container else open(archive, "wb") if archive else None
+    try:
+        with multiprocessing.Pool(jobs or os.cpu_count()) as pool:
+            #Archive output must follow input order, single files can land as they finish
+            results = pool.imap(_encode_file, work) if out else pool.imap_unordered(_encode_file, work)
+            for src, dst, data, elapsed, error in results:
+                if error:
+                    failed.append(src)
+                    print(f"FAIL {src}: {error}", file=sys.stderr)
+                    continue
+                if out:
+                    out.add(data) if container else out.write(data)
+                    size = len(data)
+                else:
+                    size = data
+                succeeded.append(src)
+                print(f"OK   {src} -> {dst or archive or container} ({size} bytes, {elapsed*1000:.2f}ms)")
+    finally:
+        if out:
+            out.close()
+
+    total = time.perf_counter() - t_start
+    rate = len(images) / total if total else 0
+    print(f"Encoded {len(succeeded)}/{len(images)} images in {total:.2f}s ({rate:.1f} images/s), {len(failed)} failed")
+    return succeeded, failed
+
+
+def size_report(inputs):
+    """Prints a table of the encoded bytes of every image per format, returns the totals"""
+
+    formats = [('Legacy', {'extended': False}), ('V1', {'extended': True}), ('Run Length', {'compressed': True})]
+    totals = dict.fromkeys([name for name, _ in formats], 0)
+    print("| Image | Size | " + " | ".join(name for name, _ in formats) + " |")
+    print("| --- | --- |" + " --- |" * len(formats))
+    for src in _collect_images(inputs):
+        encoder = MazeInstruction(src)
+        h, w = encoder.pixels.shape[:2]
+        row = []
+        for name, kwargs in formats:
+            if name == 'Legacy' and (w, h) != (30, 30):
+                row.append("-")
+                continue
+            size = len(MazeInstruction(image=encoder.img).encode(**kwargs))
+            totals[name] += size
+            row.append(str(size))
+        print(f"| {os.path.basename(src)} | {w}x{h} | " + " | ".join(row) + " |")
+    return totals
+
+
 if __name__ == "__main__":
-    encoder = MazeInstruction(IMAGE_PATH)
-    encoder.generate_bitstream(BITSTREAM_PATH)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Encode maze PNGs into instruction bitstreams.")
+    parser.add_argument('inputs', nargs='*', help="PNG files, directories or glob patterns (default: IMAGE_PATH)")
+    parser.add_argument('-o', '--out-dir', help="Directory for .bin outputs (default: beside each image)")
+    parser.add_argument('-a', '--archive', help="Concatenate every bitstream into this one file instead")
+    parser.add_argument('-c', '--container', help="Stream every bitstream into this indexed .mzc container instead")
+    parser.add_argument('-j', '--jobs', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--engine', default='numpy', choices=['numpy', 'pixel'])
+    parser.add_argument('--extended', action='store_true', default=None,
+        help="Force the extended V1 format even for 30x30 images")
+    parser.add_argument('-z', '--compress', action='store_true', help="Write the run length format (any size)")
+    parser.add_argument('--size-report', action='store_true',
+        help="Print the encoded size of every input in each format instead of writing anything")
+    args = parser.parse_args()
+
+    if args.size_report:
+        size_report(args.inputs or [IMAGE_PATH])
+    elif not args.inputs:
+        encoder = MazeInstruction(IMAGE_PATH)
+        encoder.generate_bitstream(BITSTREAM_PATH, engine=args.engine, extended=args.extended, compressed=args.compress)
+    else:
+        _, failed = batch_encode(args.inputs, args.out_dir, args.archive, args.jobs, args.engine, args.extended,
+            args.container, args.compress)
+        sys.exit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Seeded procedural mazes for scale and stress testing.
+Generates recursive backtracker, Prim's or open field mazes of any size with gems,
+monsters (with orientation) and hearts, as PNGs in the MazeInstruction colour scheme
+or as .bin instruction streams / one .mzc container directly.
+
+Refer to SETUP.md for usage.
+"""
+
+
+import os
+import random
+import argparse
+import numpy as np
+from PIL import Image
+from maze_grid import MazeGrid
+from maze_encoderv2 import MazeInstruction
+from maze_container import ContainerWriter
+
+
+class MazeGenerator:
+    """Builds one wall layout per call, every open cell is reachable from the start point."""
+
+    #Monster orientation -> offset of its MONSTER_FACING pixel, same table as the encoder
+    FACING = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+    def __init__(self, width=30, height=30, seed=None):
+        """Maze size and RNG seed, the same seed always yields the same sequence of mazes"""
+
+        if width < 3 or height < 3:
+            raise ValueError(f"Maze {width}x{height} is smaller than 3x3")
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+
+    def _backtracker(self):
+        """Depth first carve between odd cells, long corridors with few branches"""
+
+        walls = np.ones((self.height, self.width), dtype=bool)
+        walls[1, 1] = False
+        stack = [(1, 1)]
+        while stack:
+            x, y = stack[-1]
+            options = [(dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                if 0 < x + dx < self.width - 1 and 0 < y + dy < self.height - 1 and walls[y + dy, x + dx]]
+            if not options:
+                stack.pop()
+                continue
+            dx, dy = self.rng.choice(options)
+            walls[y + dy // 2, x + dx // 2] = False
+            walls[y + dy, x + dx] = False
+            stack.append((x + dx, y + dy))
+        return walls
+
+    def _prim(self):
+        """Randomised Prim's between odd cells, short dead ends and many branches"""
+
+        walls = np.ones((self.height, self.width), dtype=bool)
+        walls[1, 1] = False
+        frontier = [(1, 1, dx, dy) for dx, dy in ((2, 0), (0, 2))]
+        while frontier:
+            i = self.rng.randrange(len(frontier))
+            frontier[i], frontier[-1] = frontier[-1], frontier[i]
+            x, y, dx, dy = frontier.pop()
+            nx, ny = x + dx, y + dy
+            if not (0 < nx < self.width - 1 and 0 < ny < self.height - 1) or not walls[ny, nx]:
+                continue
+            walls[y + dy // 2, x + dx // 2] = False
+            walls[ny, nx] = False
+            frontier += [(nx, ny, ex, ey) for ex, ey in ((2, 0), (-2, 0), (0, 2), (0, -2))]
+        return walls
+
+    def _open(self, density):
+        """Border walls and randomly scattered obstacles at density"""
+
+        walls = np.zeros((self.height, self.width), dtype=bool)
+        walls[[0, -1], :] = True
+        walls[:, [0, -1]] = True
+        inner = walls[1:-1, 1:-1]
+        inner[:] = np.random.default_rng(self.rng.getrandbits(64)).random(inner.shape) < density
+        return walls
+
+    def _largest_component(self, walls):
+        """Boolean mask of the largest connected group of open cells, the first one in row major order on ties"""
+
+        grid = MazeGrid(self.width, self.height)
+        grid.as_array()[:] = walls
+        labels = grid.components().reshape(self.height + 2, grid.stride)[1:-1, 1:-1]
+        if not (labels >= 0).any():
+            return np.zeros_like(walls)
+        return labels == np.argmax(np.bincount(labels[labels >= 0]))
+
+    def generate(self, method='backtracker', gems=4, monsters=2, hearts=1, density=0.25):
+        """
+        Returns the maze as an RGB array (height x width x 3) in the MazeInstruction colours.
+        method: backtracker, prim or open (obstacles at density).
+        Only the largest connected area is kept open. Start is its first cell in row major
+        order, end its last.
+        Monsters face a random open neighbour, marked with MONSTER_FACING.
+        """
+        match method:
+            case 'backtracker':
+                walls = self._backtracker()
+            case 'prim':
+                walls = self._prim()
+            case 'open':
+                walls = self._open(density)
+            case _:
+                raise ValueError(f"Unknown maze method: {method}")
+
+        walls |= ~self._largest_component(walls)
+        ys, xs = np.nonzero(~walls)
+        start, end = (int(xs[0]), int(ys[0])), (int(xs[-1]), int(ys[-1]))
+
+        px = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        px[~walls] = 255
+        px[start[1], start[0]] = MazeInstruction.STARTPOINT
+        px[end[1], end[0]] = MazeInstruction.ENDPOINT
+
+        free = [(int(x), int(y)) for x, y in zip(xs, ys) if (x, y) != start and (x, y) != end]
+        if gems + monsters + hearts > len(free):
+            raise ValueError(f"{gems + monsters + hearts} entities do not fit in {len(free)} open cells")
+        picks = self.rng.sample(free, gems + monsters + hearts)
+        used = set(picks) | {start, end}
+
+        for x, y in picks[:gems]:
+            px[y, x] = MazeInstruction.GEM
+        for x, y in picks[gems + monsters:]:
+            px[y, x] = MazeInstruction.HEART
+        entities = set(used)
+        for x, y in picks[gems:gems + monsters]:
+            px[y, x] = MazeInstruction.MONSTER
+            #A facing pixel next to another entity would turn a neighbouring monster as well
+            options = [(x + dx, y + dy) for dx, dy in self.FACING
+                if not walls[y + dy, x + dx] and (x + dx, y + dy) not in used
+                and all((x + dx + ex, y + dy + ey) not in entities or (ex, ey) == (-dx, -dy) for ex, ey in self.FACING)]
+            if options:
+                fx, fy = self.rng.choice(options)
+                px[fy, fx] = MazeInstruction.MONSTER_FACING
+                used.add((fx, fy))
+        return px
+
+    def image(self, **kwargs):
+        """generate() as a PIL image"""
+
+        return Image.fromarray(self.generate(**kwargs), 'RGB')
+
+    def encode(self, engine='numpy', extended=None, compressed=False, **kwargs):
+        """generate() encoded straight to instruction bytes, no PNG round trip"""
+
+        return MazeInstruction(image=self.image(**kwargs)).encode(engine, extended, compressed)
+
+    def save(self, path, **kwargs):
+        """Writes a PNG, or the encoded .bin stream when path ends in .bin"""
+
+        if path.endswith('.bin'):
+            with open(path, "wb") as f:
+                f.write(self.encode(**kwargs))
+        else:
+            self.image(**kwargs).save(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate seeded random mazes.")
+    parser.add_argument('out_dir', help="Output directory")
+    parser.add_argument('-n', '--count', type=int, default=1, help="Number of mazes")
+    parser.add_argument('--size', type=int, nargs=2, default=[30, 30], metavar=('W', 'H'))
+    parser.add_argument('--method', default='backtracker', choices=['backtracker', 'prim', 'open'])
+    parser.add_argument('--density', type=float, default=0.25, help="Obstacle density for --method open")
+    parser.add_argument('--gems', type=int, default=4)
+    parser.add_argument('--monsters', type=int, default=2)
+    parser.add_argument('--hearts', type=int, default=1)
+    parser.add_argument('--format', default='png', choices=['png', 'bin', 'mzc'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-z', '--compress', action='store_true', help="Run length format for bin and mzc output")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    generator = MazeGenerator(*args.size, seed=args.seed)
+    options = dict(method=args.method, gems=args.gems, monsters=args.monsters, hearts=args.hearts, density=args.density)
+    if args.format == 'mzc':
+        with ContainerWriter(os.path.join(args.out_dir, "mazes.mzc")) as container:
+            for i in range(args.count):
+                container.add(generator.encode(compressed=args.compress, **options))
+    else:
+        if args.format == 'bin':
+            options['compressed'] = args.compress
+        for i in range(args.count):
+            generator.save(os.path.join(args.out_dir, f"maze_{i:05d}.{args.format}"), **options)
+    print(f"Wrote {args.count} {args.size[0]}x{args.size[1]} {args.method} mazes to {args.out_dir}")
@@ -0,0 +1,108 @@
+"""
+Flat grid shared by the decoder and every solver.
+Cells are addressed by a single integer id instead of (x, y) tuples.
+
+Refer to README.md for the layout.
+"""
+
+
+import hashlib
+import numpy as np
+
+
+class MazeGrid:
+    """
+    Wall map stored row major in one bytearray (1 = wall, 0 = open).
+    A one cell wall border surrounds the maze, so neighbour probes need no bounds checks.
+    """
+
+    def __init__(self, width=30, height=30):
+        """Allocates an open maze of width x height inside the wall border"""
+
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.size = self.stride * (height + 2)
+        self.cells = bytearray(b'\x01') * self.size
+        for y in range(height):
+            start = self.index(0, y)
+            self.cells[start:start + width] = bytes(width)
+
+        #Neighbour offsets in solver order: (0, 1), (1, 0), (0, -1), (-1, 0)
+        self.offsets = (self.stride, 1, -self.stride, -1)
+
+    def index(self, x, y):
+        """Cell id of (x, y)"""
+
+        return (y + 1) * self.stride + x + 1
+
+    def coords(self, cell):
+        """(x, y) of a cell id"""
+
+        y, x = divmod(cell, self.stride)
+        return (x - 1, y - 1)
+
+    def set_wall(self, x, y):
+        """Marks (x, y) as wall, ignoring positions outside the maze"""
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.cells[self.index(x, y)] = 1
+
+    def is_wall(self, x, y):
+        """True for walls and anything outside the maze"""
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[self.index(x, y)] == 1
+        return True
+
+    def new_mask(self):
+        """Zeroed per-cell byte mask, used as a visited set"""
+
+        return bytearray(self.size)
+
+    def digest(self):
+        """Hex digest of the wall layout and size, equal for identical mazes"""
+
+        return hashlib.blake2b(
+            bytes(self.cells) + self.width.to_bytes(4, 'big') + self.height.to_bytes(4, 'big'),
+            digest_size=16
+        ).hexdigest()
+
+    def components(self):
+        """
+        Connected component label per cell id (int32 array), -1 for walls.
+        Labels are numbered 0.. in row major order of each component's first cell.
+        Vectorised: every edge hooks the larger root under the smaller one, then
+        pointer jumping flattens the trees, until no edge joins two roots.
+        """
+        open_ = np.frombuffer(self.cells, dtype=np.uint8) == 0
+        ids = np.flatnonzero(open_)
+        right, down = ids[open_[ids + 1]], ids[open_[ids + self.stride]]
+        u = np.concatenate([right, down])
+        v = np.concatenate([right + 1, down + self.stride])
+        root = np.arange(self.size, dtype=np.int32)
+        while True:
+            ru, rv = root[u], root[v]
+            joined = ru != rv
+            if not joined.any():
+                break
+            ru, rv = ru[joined], rv[joined]
+            low = np.minimum(ru, rv)
+            np.minimum.at(root, ru, low)
+            np.minimum.at(root, rv, low)
+            while True:
+                jumped = root[root]
+                if np.array_equal(jumped, root):
+                    break
+                root = jumped
+            u, v = u[joined], v[joined]
+
+        labels = np.full(self.size, -1, dtype=np.int32)
+        labels[ids] = np.unique(root[ids], return_inverse=True)[1]
+        return labels
+
+    def as_array(self):
+        """Zero copy uint8 view (height x width) of the maze without the border"""
+
+        full = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height + 2, self.stride)
+        return full[1:-1, 1:-1]
@@ -0,0 +1,153 @@
+"""
+Search instrumentation for MazeSolverV2.
+Instrument wraps every solver step and derives named counters per algorithm from what
+the step reports doing (cell expanded, search side, cells queued) and the tracker after
+it (frontier size, Visited mask), so the search code itself carries no bookkeeping.
+An optional tracer callback sees every expansion.
+profiled() runs any call under cProfile and tracemalloc.
+
+Refer to README.md for the counters.
+"""
+
+
+import io
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+
+class Instrument:
+    """
+    Counters per algorithm title, filled in by MazeSolverV2 when passed as instrument=.
+    tracer(name, event) is called after every step that expands a cell with
+    {'step', 'cell', 'side', 'target', 'frontier', 'pushes'}, cell is the (x, y) expanded or
+    moved from, side is 1 for the backward half of a bidirectional search, target is the goal
+    index the expansion searched for.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer
+        self.stats = {}
+        #Per title: [Visited Mask, Leg Target, Expanded Mask per search side] of the current leg
+        self.legs = {}
+
+    def _frontier(self, name, tracker):
+        """Entries waiting in the open set"""
+
+        match name:
+            case 'Hug Left':
+                return 0
+            case 'Bi-BFS' | 'Bi-A-Star':
+                return len(tracker[3][0]) + len(tracker[3][1])
+            case 'Multi-BFS':
+                return sum(len(tree[2]) for tree in tracker[3].values())
+            case _:
+                return len(tracker[3])
+
+    def _new(self, solver):
+        """Zeroed counters"""
+
+        return {
+            'steps': 0,
+            'expansions': 0,
+            'pops': 0,
+            'pushes': 0,
+            'reexpansions': 0,
+            'peak_frontier': 0,
+            'peak_visited': 0,
+            'leg_times': [0.0] * len(solver.goal_ids),
+            'leg_steps': [0] * len(solver.goal_ids)
+        }
+
+    def step(self, solver, name, tracker):
+        """Runs one solver step and updates the counters of name"""
+
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = self._new(solver)
+            stats['pushes'] = self._frontier(name, tracker)  #Seeded by _init_trackers
+            self.legs[name] = [tracker[2], tracker[0], solver.grid.new_mask(), solver.grid.new_mask()]
+        leg = self.legs[name]
+        target = tracker[0]
+
+        t0 = time.perf_counter()
+        cell, side, pushes = solver._advance(name, tracker)
+        elapsed = time.perf_counter() - t0
+
+        stats['steps'] += 1
+        stats['leg_times'][target] += elapsed
+        stats['leg_steps'][target] += 1
+        after = self._frontier(name, tracker)
+        if cell is not None:
+            if name != 'Hug Left':
+                stats['pops'] += 1
+            stats['expansions'] += 1
+            expanded = leg[2 + side]
+            if expanded[cell]:
+                stats['reexpansions'] += 1
+            expanded[cell] = 1
+        stats['pushes'] += pushes
+        stats['peak_frontier'] = max(stats['peak_frontier'], after)
+        #Expansions count per leg, Multi-BFS keeps one Visited mask across legs
+        if tracker[0] != leg[1]:
+            leg[1:] = [tracker[0], solver.grid.new_mask(), solver.grid.new_mask()]
+        if tracker[2] is not leg[0]:
+            stats['peak_visited'] = max(stats['peak_visited'], leg[0].count(1))
+            leg[0] = tracker[2]
+
+        if self.tracer and cell is not None:
+            self.tracer(name, {
+                'step': tracker[6],
+                'cell': solver.grid.coords(cell),
+                'side': side,
+                'target': target,
+                'frontier': after,
+                'pushes': pushes
+            })
+
+    def summary(self, solver, name, tracker):
+        """Counters of name including the Visited mask of the leg in progress"""
+
+        stats = self.stats.get(name) or self._new(solver)
+        return {**stats, 'peak_visited': max(stats['peak_visited'], tracker[2].count(1))}
+
+    def to_json(self):
+        return json.dumps(self.stats)
+
+
+def profiled(fn, *args, top=20, **kwargs):
+    """
+    Calls fn(*args, **kwargs) under cProfile and tracemalloc.
+    Returns (result, report), report is JSON ready:
+    {'cpu': [{'function', 'calls', 'tottime', 'cumtime'}], 'memory': {'peak_bytes', 'current_bytes', 'top'}}
+    with the top functions by cumulative time and the top allocation sites by size.
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    cpu = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        cpu.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'tottime': tottime,
+            'cumtime': cumtime
+        })
+    cpu.sort(key=lambda entry: entry['cumtime'], reverse=True)
+    allocations = [
+        {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", 'size': stat.size, 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:top]
+    ]
+    return result, {
+        'cpu': cpu[:top],
+        'memory': {'peak_bytes': peak, 'current_bytes': current, 'top': allocations}
+    }
@@ -0,0 +1,332 @@
+"""
+Objective planning for MazeSolverV2.
+Builds true shortest path distances between points of interest with one BFS per point,
+then orders gems, monsters and hearts with a pluggable route optimiser.
+
+Run directly to benchmark the optimisers against greedy ordering.
+Refer to README.md for the planner method.
+"""
+
+
+import time
+import random
+import argparse
+from array import array
+from collections import OrderedDict, deque
+from maze_bitboard import BitBoard
+
+
+INF = float('inf')
+CACHE_SIZE = 128        #Distance tables kept across solver instances
+START_HP = 6            #Initial Health, each monster costs 1, each heart restores 2
+HELD_KARP_LIMIT = 12    #Largest objective count (gems + monsters + hearts) solved exactly
+
+
+class MazePlanner:
+    """Wall-aware distances between points of interest on a MazeGrid."""
+
+    _tables = OrderedDict()
+
+    def __init__(self, grid, engine='bfs'):
+        """
+        Hashes the wall layout so tables can be shared between identical mazes.
+        engine: bfs (per-cell queue) or bitboard (BitBoard wavefronts, faster on open grids)
+        """
+        self.grid = grid
+        self.key = grid.digest()
+        self.engine = engine
+
+    def bfs(self, source):
+        """Distance from cell id source to every cell, -1 where unreachable"""
+
+        cells, offsets = self.grid.cells, self.grid.offsets
+        dist = array('i', [-1]) * self.grid.size
+        dist[source] = 0
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            d = dist[cell] + 1
+            for offset in offsets:
+                n = cell + offset
+                if not cells[n] and dist[n] == -1:
+                    dist[n] = d
+                    queue.append(n)
+        return dist
+
+    def distance_table(self, points):
+        """
+        Square matrix of shortest path lengths between (x, y) points, INF if unreachable.
+        Cached per maze layout and point list.
+        """
+        key = (self.key, tuple(points))
+        if key in self._tables:
+            self._tables.move_to_end(key)
+            return self._tables[key]
+
+        ids = [self.grid.index(x, y) for x, y in points]
+        table = []
+        match self.engine:
+            case 'bfs':
+                for source in ids:
+                    dist = self.bfs(source)
+                    table.append([dist[t] if dist[t] != -1 else INF for t in ids])
+            case 'bitboard':
+                board = BitBoard(self.grid)
+                for source in ids:
+                    table.append([d if d != -1 else INF for d in board.distances(source, ids)])
+            case _:
+                raise ValueError(f"Unknown distance engine: {self.engine}")
+        self.remember(points, table)
+        return table
+
+    def remember(self, points, table):
+        """Caches a distance table computed elsewhere (e.g. maze_batch), so plan() skips the BFS"""
+
+        key = (self.key, tuple(points))
+        self._tables[key] = table
+        self._tables.move_to_end(key)
+        if len(self._tables) > CACHE_SIZE:
+            self._tables.popitem(last=False)
+
+    def plan(self, start, gems, monsters, hearts, end, strategy='auto'):
+        """
+        Returns the goal path (list of (x, y)) visiting every gem and monster, picking up
+        hearts only as needed so HP never drops below 1, and finishing at end.
+
+        strategy:
+        greedy      nearest next objective, detour to the nearest heart when HP is at 1
+        held-karp   exact bitmask DP, O(2^n * n^2) for n objectives
+        local       greedy followed by 2-opt, Or-opt and heart swap local search
+        auto        held-karp up to HELD_KARP_LIMIT objectives, local above
+        """
+        points = [start] + gems + monsters + hearts + [end]
+        self.table = self.distance_table(points)
+        self.hp_delta = [0] + [0] * len(gems) + [-1] * len(monsters) + [2] * len(hearts) + [0]
+        self.end = len(points) - 1
+        self.objectives = list(range(1, 1 + len(gems) + len(monsters)))
+        self.hearts = list(range(1 + len(gems) + len(monsters), self.end))
+
+        if strategy == 'auto':
+            strategy = 'held-karp' if self.end - 1 <= HELD_KARP_LIMIT else 'local'
+
+        match strategy:
+            case 'greedy':
+                route = self._greedy()
+            case 'held-karp':
+                route = self._held_karp()
+            case 'local':
+                route = self._local_search(self._greedy())
+            case _:
+                raise ValueError(f"Unknown planner strategy: {strategy}")
+
+        self.cost = self.route_cost(route)
+        return [points[i] for i in route] + [end]
+
+    def route_cost(self, route):
+        """Total distance of start -> route -> end, INF if HP would reach 0"""
+
+        table, hp_delta = self.table, self.hp_delta
+        hp, current, cost = START_HP, 0, 0
+        for i in route:
+            if hp_delta[i] < 0 and hp <= 1:
+                return INF
+            hp += hp_delta[i]
+            cost += table[current][i]
+            current = i
+        return cost + table[current][self.end]
+
+    def _greedy(self):
+        """Nearest next objective, fetching the nearest heart first when HP is at 1"""
+
+        dist, hp_delta = self.table, self.hp_delta
+        current_hp = START_HP
+        current = 0
+        route = []
+        objectives = self.objectives[:]
+        hearts_available = self.hearts[:]
+
+        while objectives:
+            objectives.sort(key=lambda p: dist[current][p])
+            target = objectives[0]
+
+            if hp_delta[target] < 0 and current_hp <= 1 and hearts_available:
+                hearts_available.sort(key=lambda p: dist[current][p])
+                heart_target = hearts_available.pop(0)
+                route.append(heart_target)
+                current = heart_target
+                current_hp += 2
+
+            target = objectives.pop(0)
+            route.append(target)
+            current = target
+            current_hp += hp_delta[target]
+
+        return route
+
+    def _held_karp(self):
+        """
+        Exact DP over subsets of objectives and hearts.
+        dp[mask][last] is the shortest start -> last walk visiting mask. HP only depends
+        on which monsters and hearts are in mask, so the constraint is checked per transition.
+        """
+        table, hp_delta = self.table, self.hp_delta
+        n = self.end - 1
+        if n == 0:
+            return []
+        full = 1 << n
+        required = 0
+        for i in self.objectives:
+            required |= 1 << (i - 1)
+
+        hp = [START_HP] * full
+        for mask in range(1, full):
+            low = mask & -mask
+            hp[mask] = hp[mask ^ low] + hp_delta[low.bit_length()]
+
+        dp = [INF] * (full * n)
+        parent = [-1] * (full * n)
+        for j in range(n):
+            dp[(1 << j) * n + j] = table[0][j + 1]
+
+        for mask in range(1, full):
+            row = mask * n
+            can_fight = hp[mask] > 1
+            for last in range(n):
+                cost = dp[row + last]
+                if cost == INF:
+                    continue
+                dist = table[last + 1]
+                for j in range(n):
+                    bit = 1 << j
+                    if mask & bit or (hp_delta[j + 1] < 0 and not can_fight):
+                        continue
+                    k = (mask | bit) * n + j
+                    new = cost + dist[j + 1]
+                    if new < dp[k]:
+                        dp[k] = new
+                        parent[k] = last
+
+        #An empty route is only valid when there is nothing to collect
+        best, best_mask, best_last = (table[0][self.end] if not required else INF), 0, -1
+        for mask in range(1, full):
+            if mask & required != required:
+                continue
+            for last in range(n):
+                total = dp[mask * n + last] + table[last + 1][self.end]
+                if total < best:
+                    best, best_mask, best_last = total, mask, last
+
+        if best == INF:
+            return self._greedy()
+
+        route = []
+        mask, last = best_mask, best_last
+        while last != -1:
+            route.append(last + 1)
+            prev = parent[mask * n + last]
+            mask ^= 1 << last
+            last = prev
+        route.reverse()
+        return route
+
+    def _local_search(self, route):
+        """
+        First improvement local search from a feasible route.
+        Moves: 2-opt segment reversal, Or-opt relocation of 1 to 3 stops,
+        swapping a heart for an unused one and dropping a heart that is no longer needed.
+        """
+        best = self.route_cost(route)
+        improved = True
+        while improved:
+            improved = False
+            n = len(route)
+
+            for i in range(n - 1):
+                for j in range(i + 1, n):
+                    candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    cost = self.route_cost(candidate)
+                    if cost < best:
+                        route, best, improved = candidate, cost, True
+
+            for length in (1, 2, 3):
+                for i in range(n - length + 1):
+                    segment = route[i:i + length]
+                    rest = route[:i] + route[i + length:]
+                    for j in range(len(rest) + 1):
+                        if j == i:
+                            continue
+                        candidate = rest[:j] + segment + rest[j:]
+                        cost = self.route_cost(candidate)
+                        if cost < best:
+                            route, best, improved = candidate, cost, True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    break
+
+            for i, stop in enumerate(route):
+                if stop not in self.hearts:
+                    continue
+                candidate = route[:i] + route[i + 1:]
+                cost = self.route_cost(candidate)
+                if cost < best:
+                    route, best, improved = candidate, cost, True
+                    break
+                for heart in self.hearts:
+                    if heart in route:
+                        continue
+                    candidate = route[:i] + [heart] + route[i + 1:]
+                    cost = self.route_cost(candidate)
+                    if cost < best:
+                        route, best, improved = candidate, cost, True
+                        break
+                if improved:
+                    break
+
+        return route
+
+
+def _benchmark(path, counts, seed):
+    """Compares route length and planning time of each strategy on random objective sets"""
+
+    from maze_solverv2 import MazeSolverV2
+
+    solver = MazeSolverV2(path)
+    grid = solver.grid
+    planner = MazePlanner(grid)
+    rng = random.Random(seed)
+
+    #Only open cells connected to the start are useful objectives
+    dist = planner.bfs(grid.index(*solver.start_pos))
+    open_cells = [grid.coords(c) for c in range(grid.size) if dist[c] > 0 and grid.coords(c) != solver.end_pos]
+
+    cases = [('bundled', solver.entities['gems'], solver.entities['monsters'], solver.entities['hearts'])]
+    for n in counts:
+        picks = rng.sample(open_cells, n)
+        n_monsters = n // 2
+        n_hearts = max(1, n // 5)
+        n_gems = n - n_monsters - n_hearts
+        cases.append((f"random {n}", picks[:n_gems], picks[n_gems:n_gems + n_monsters], picks[n_gems + n_monsters:]))
+
+    print("| Objectives | Strategy | Route Length | Planning Time (ms) |")
+    print("| --- | --- | --- | --- |")
+    for name, gems, monsters, hearts in cases:
+        n = len(gems) + len(monsters) + len(hearts)
+        for strategy in ('greedy', 'local', 'held-karp'):
+            if strategy == 'held-karp' and n > HELD_KARP_LIMIT:
+                continue
+            MazePlanner._tables.clear()
+            t0 = time.perf_counter()
+            planner.plan(solver.start_pos, gems, monsters, hearts, solver.end_pos, strategy)
+            elapsed = time.perf_counter() - t0
+            print(f"| {name} ({n}) | {strategy} | {planner.cost} | {elapsed*1000:.2f} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark objective ordering strategies.")
+    parser.add_argument('path', nargs='?', default='maze_v2.bin', help="Instruction binary to plan on")
+    parser.add_argument('--counts', type=int, nargs='*', default=[6, 9, 12, 20, 40], help="Random objective counts")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    _benchmark(args.path, args.counts, args.seed)
@@ -0,0 +1,341 @@
+"""
+Animation output for MazeSolverV2.
+PanelRenderer paints each algorithm panel from a cached static layer plus per-step deltas,
+and frames are encoded into the GIF as soon as they are drawn, so memory stays flat
+no matter how many steps a solve takes.
+
+Run directly to benchmark frames per second against the legacy ImageDraw renderer.
+Refer to README.md for details.
+"""
+
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from PIL import Image, ImageDraw, GifImagePlugin
+
+
+#Fixed palette shared by every frame (RGB)
+COLOURS = [
+    (240, 240, 240),    #Background
+    (0, 0, 0),          #Wall / Title
+    (100, 100, 100),    #Stats Text
+    (200, 255, 200),    #Visited
+    (255, 0, 0),        #Path
+    (34, 177, 80),      #Heart
+    (255, 242, 0),      #Gem
+    (111, 49, 152),     #Monster
+    (0, 183, 239),      #Start Point
+    (237, 28, 36),      #End Point
+    (255, 165, 0),      #Current Target
+    (255, 255, 255)
+]
+#Grey ramp so anti-aliased text quantises cleanly
+COLOURS += [(v, v, v) for v in range(16, 240, 16)]
+TRANSPARENT = 255   #Palette index left free for unchanged pixels
+
+#Palette indices
+BG, WALL, TEXT, VISITED, PATH, HEART, GEM, MONSTER, START, END, TARGET = range(11)
+
+
+def palette_image():
+    """P mode image carrying COLOURS, used as the quantise target"""
+
+    flat = [c for colour in COLOURS for c in colour]
+    img = Image.new('P', (1, 1))
+    img.putpalette(flat + [0] * (768 - len(flat)))
+    return img
+
+
+class PanelRenderer:
+    """
+    Draws the side by side solver panels straight into a palette index array.
+    Walls and entities are painted once, then each frame only repaints cells whose
+    visited or path state changed, and the current target marker.
+    Reads MazeSolverV2 trackers: [Current Target, Path, Visited, ..., Elapsed Time, Steps].
+    """
+
+    def __init__(self, solver, titles, scale, padding=40, top=50):
+        """Builds the static cell layers and paints the initial canvas"""
+
+        self.solver = solver
+        self.grid = solver.grid
+        self.scale = scale
+        self.top = top
+        h, w = self.grid.height, self.grid.width
+        self.maze_w, self.maze_h = w * scale, h * scale
+        self.size = ((self.maze_w * len(titles)) + (padding * len(titles)), self.maze_h + 100)
+        self.canvas = np.full((self.size[1], self.size[0]), BG, dtype=np.uint8)
+        self.palette = palette_image().getpalette()
+
+        #Static layers: base colour per cell and the entity/start/end overlays
+        self.wall = self.grid.as_array().astype(bool)
+        self.entity = np.zeros((h, w), dtype=np.uint8)
+        for key, colour in [('hearts', HEART), ('gems', GEM), ('monsters', MONSTER)]:
+            for x, y in solver.entities[key]:
+                self.entity[y, x] = colour
+        self.special = np.zeros((h, w), dtype=np.uint8)
+        for pos, colour in [(solver.start_pos, START), (solver.end_pos, END)]:
+            if pos:
+                self.special[pos[1], pos[0]] = colour
+
+        #Per panel state [Offset X, Visited, On Path, Path Length Drawn, Target Drawn]
+        self.panels = []
+        for i in range(len(titles)):
+            ox = i * (self.maze_w + padding) + padding
+            self.panels.append([ox, np.zeros((h, w), dtype=bool), np.zeros((h, w), dtype=bool), 0, None])
+            self._paint_all(self.panels[-1])
+
+        #Titles and stat labels never change, draw them into the canvas once
+        img = Image.fromarray(self.canvas.copy(), 'P')
+        draw = ImageDraw.Draw(img)
+        self.font = draw.getfont()
+        self.text_y = top + self.maze_h + 10
+        for panel, title in zip(self.panels, titles):
+            draw.text((panel[0] + 40, top - 30), title, fill=WALL)
+            draw.text((panel[0] + 40, self.text_y), "Steps: ", fill=TEXT)
+            draw.text((panel[0] + 120, self.text_y), "Path Length: ", fill=TEXT)
+            draw.text((panel[0] + 240, self.text_y), "Elapsed Time: ", fill=TEXT)
+        self.canvas[:] = np.asarray(img)
+
+        #Stat values are blitted from cached glyph masks into [(X, Width)] fields after each label
+        self.glyphs = {}
+        steps, length, elapsed = (int(draw.textlength(label)) for label in ("Steps: ", "Path Length: ", "Elapsed Time: "))
+        self.fields = [(40 + steps, 80 - steps), (120 + length, 120 - length), (240 + elapsed, 120)]
+
+    def _colours(self, panel, ys, xs):
+        """Layered colour of the given cells: wall/visited, entity, path, start/end"""
+
+        colour = np.where(self.wall[ys, xs], WALL, np.where(panel[1][ys, xs], VISITED, BG)).astype(np.uint8)
+        entity = self.entity[ys, xs]
+        colour = np.where(entity != 0, entity, colour)
+        colour = np.where(panel[2][ys, xs], PATH, colour)
+        special = self.special[ys, xs]
+        return np.where(special != 0, special, colour)
+
+    def _paint_all(self, panel):
+        """Repaints a whole panel with one upscaled array write"""
+
+        h, w = self.wall.shape
+        ys, xs = np.indices((h, w))
+        colours = self._colours(panel, ys, xs)
+        block = np.repeat(np.repeat(colours, self.scale, axis=0), self.scale, axis=1)
+        self.canvas[self.top:self.top + self.maze_h, panel[0]:panel[0] + self.maze_w] = block
+
+    def _paint_cells(self, panel, ys, xs):
+        """Repaints individual cells, one slice write each"""
+
+        s, ox, top = self.scale, panel[0], self.top
+        for y, x, colour in zip(ys.tolist(), xs.tolist(), self._colours(panel, ys, xs).tolist()):
+            self.canvas[top + y*s:top + (y+1)*s, ox + x*s:ox + (x+1)*s] = colour
+
+    def _paint_target(self, panel, cell):
+        """3px outline on the current target cell"""
+
+        s = self.scale
+        x, y = self.grid.coords(cell)
+        y0, x0 = self.top + y*s, panel[0] + x*s
+        width = min(3, s)
+        block = self.canvas[y0:y0 + s, x0:x0 + s]
+        block[:width, :] = TARGET
+        block[-width:, :] = TARGET
+        block[:, :width] = TARGET
+        block[:, -width:] = TARGET
+
+    def _update(self, panel, tracker):
+        """Applies visited, path and target deltas for one panel"""
+
+        grid = self.grid
+        visited = np.frombuffer(tracker[2], dtype=np.uint8).reshape(grid.height + 2, grid.stride)[1:-1, 1:-1] != 0
+        changed = visited != panel[1]
+        panel[1] = visited
+
+        path = tracker[1]
+        if len(path) < panel[3]:
+            panel[2][:] = False
+            panel[3] = 0
+        if len(path) > panel[3]:
+            new = np.array(path[panel[3]:])
+            ys, xs = new // grid.stride - 1, new % grid.stride - 1
+            panel[2][ys, xs] = True
+            changed[ys, xs] = True
+            panel[3] = len(path)
+
+        goal_ids = self.solver.goal_ids
+        target = goal_ids[tracker[0]] if tracker[0] < len(goal_ids) else None
+        if panel[4] is not None and panel[4] != target:
+            x, y = grid.coords(panel[4])
+            changed[y, x] = True
+
+        ys, xs = np.nonzero(changed)
+        if len(ys) > 64:
+            self._paint_all(panel)
+        elif len(ys):
+            self._paint_cells(panel, ys, xs)
+        if target is not None:
+            self._paint_target(panel, target)
+        panel[4] = target
+
+    def _glyph(self, char):
+        """Text mask and advance of one character, rendered once"""
+
+        if char not in self.glyphs:
+            #Mode 1 matches the unantialiased text ImageDraw produces on the P mode canvas
+            img = Image.new('1', (16, 16), 0)
+            draw = ImageDraw.Draw(img)
+            draw.text((0, 0), char, font=self.font, fill=1)
+            self.glyphs[char] = (np.asarray(img), int(draw.textlength(char, font=self.font)))
+        return self.glyphs[char]
+
+    def _blit_text(self, x, y, width, text):
+        """Clears a field and writes text into it from cached glyphs"""
+
+        x_end = min(x + width, self.size[0])
+        self.canvas[y:y + 16, x:x_end] = BG
+        for char in text:
+            mask, advance = self._glyph(char)
+            mask = mask[:, :max(0, x_end - x)]
+            region = self.canvas[y:y + 16, x:x + mask.shape[1]]
+            region[mask] = TEXT
+            x += advance
+
+    def render(self, trackers):
+        """Updates every panel and returns the frame as a P mode image"""
+
+        for panel, tracker in zip(self.panels, trackers.values()):
+            self._update(panel, tracker)
+            values = (f"{tracker[6]}", f"{len(tracker[1])}", f"{tracker[5]*1000:.2f}ms")
+            for (x, width), text in zip(self.fields, values):
+                self._blit_text(panel[0] + x, self.text_y, width, text)
+
+        #Copy, the GIF writer may still hold this frame when the canvas changes
+        frame = Image.fromarray(self.canvas.copy(), 'P')
+        frame.putpalette(self.palette)
+        return frame
+
+
+class GifStreamWriter:
+    """
+    Writes an animated GIF one frame at a time with a fixed global palette.
+    Each frame is cropped to the region that changed since the last written frame,
+    and identical frames are merged into one longer frame.
+    Only the last written frame and the pending frame are held in memory.
+    """
+
+    def __init__(self, path, duration=40, loop=0):
+        """Opens path for writing, the header is written with the first frame"""
+
+        self.fp = open(path, "wb")
+        self.duration = duration
+        self.loop = loop
+        self.palette = palette_image()
+        self.pending = None
+        self.pending_duration = 0
+        self.previous = None
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _to_palette(self, frame):
+        """Maps a frame onto the fixed palette without dithering"""
+
+        if frame.mode == 'P':
+            return frame
+        return frame.convert('RGB').quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+    def _flush(self):
+        """Encodes the pending frame straight to disk"""
+
+        frame = self.pending
+        pixels = np.asarray(frame)
+        offset = (0, 0)
+        params = {'duration': self.pending_duration}
+        if self.count == 0:
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': self.loop, 'duration': self.pending_duration})
+            for block in header:
+                self.fp.write(block)
+        else:
+            #Only the bounding box of changed pixels is encoded
+            changed = pixels != self.previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            cols = np.flatnonzero(changed.any(axis=0))
+            top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            #Unchanged pixels inside the box become transparent, long runs compress well
+            delta = np.where(changed[top:bottom, left:right], pixels[top:bottom, left:right], TRANSPARENT)
+            frame = Image.fromarray(delta.astype(np.uint8), 'P')
+            frame.putpalette(self.palette.getpalette())
+            offset = (int(left), int(top))
+            params['transparency'] = TRANSPARENT
+        for block in GifImagePlugin.getdata(frame, offset, **params):
+            self.fp.write(block)
+        self.previous = pixels
+        self.count += 1
+
+    def write(self, frame):
+        """Queues frame, encoding the previous one unless they are identical"""
+
+        frame = self._to_palette(frame)
+        if self.pending is not None:
+            if np.array_equal(np.asarray(frame), np.asarray(self.pending)):
+                self.pending_duration += self.duration
+                return
+            self._flush()
+        self.pending = frame
+        self.pending_duration = self.duration
+
+    def close(self, hold=0):
+        """
+        Writes the last frame, shown for an extra hold milliseconds, and the trailer.
+        A GIF needs at least one frame, without any the file is removed with a warning.
+        """
+        if self.fp.closed:
+            return
+        if self.pending is None and self.count == 0:
+            self.fp.close()
+            os.remove(self.fp.name)
+            print(f"No frames written, {self.fp.name} not created", file=sys.stderr)
+            return
+        if self.pending is not None:
+            self.pending_duration += hold
+            self._flush()
+            self.pending = None
+        self.fp.write(b";")
+        self.fp.close()
+
+
+def _benchmark(path, frames):
+    """Frames per second of each renderer over the same lockstep solve, GIF encoding excluded"""
+
+    from maze_solverv2 import MazeSolverV2
+
+    print("| Renderer | Frames | Render Time (s) | FPS |")
+    print("| --- | --- | --- | --- |")
+    for renderer in ('draw', 'cached'):
+        solver = MazeSolverV2(path)
+        solver._get_path()
+        trackers = solver._init_trackers()
+        draw_frame = solver._frame_renderer(renderer, trackers)
+        count, elapsed = 0, 0
+        while count < frames and not all(tracker[4] for tracker in trackers.values()):
+            for name, tracker in trackers.items():
+                if not tracker[4]:
+                    solver._step(name, tracker)
+            t0 = time.perf_counter()
+            draw_frame(trackers)
+            elapsed += time.perf_counter() - t0
+            count += 1
+        print(f"| {renderer} | {count} | {elapsed:.2f} | {count / elapsed:.1f} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark solver frame rendering.")
+    parser.add_argument('path', nargs='?', default='maze_v2.bin', help="Instruction binary to solve")
+    parser.add_argument('--frames', type=int, default=200, help="Frames rendered per renderer")
+    args = parser.parse_args()
+    _benchmark(args.path, args.frames)
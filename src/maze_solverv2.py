@@ -1,7 +1,8 @@
 """
-Solves maze constructed by binary file, using BFS, Greedy DFS and A*Star.
+Solves maze constructed by binary file, using BFS, Greedy DFS, A*Star, Jump Point Search,
+bidirectional BFS / A*Star and a BFS that keeps its trees across legs.
 V2 includes multi-task functions.
-Takes in binary file encoded by maze_encoderv2.py.
+Takes in binary file encoded by maze_encoderv2.py, either legacy 30x30 or extended V1.
 
 Refer to SETUP.md for usage.
 """
@@ -9,43 +10,97 @@ Refer to SETUP.md for usage.
 
 import struct
 import os
+import sys
+import json
 import heapq
 import time
+import argparse
+import numpy as np
+from array import array
+from maze_grid import MazeGrid
+from maze_planner import MazePlanner
+from maze_container import open_archive
+from maze_cache import PathCache, CACHE_SIZE
+from maze_instrument import Instrument, profiled
+from maze_render import GifStreamWriter, PanelRenderer
 from PIL import Image, ImageDraw
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 BITSTREAM_PATH = 'maze_v2.bin'  #Instruction Binary (Generated by maze_encoder)
 GIF_PATH = 'maze_v2.gif'        #Output Animation
+INF = float('inf')
+ALGORITHMS = ['Hug Left', 'BFS', 'Greedy DFS', 'A-Star', 'JPS', 'Bi-BFS', 'Bi-A-Star', 'Multi-BFS']
+SKIP_AHEAD = ('BFS', 'Greedy DFS', 'A-Star')    #End a leg at whichever remaining goal they pop first
+UNCACHED = ('Hug Left', 'Multi-BFS')            #Never read or write the PathCache
+
+
+class _RecordedMask(bytearray):
+    """Visited mask that logs the cell ids newly set to 1, used to record steps for replay"""
+
+    def __init__(self, mask):
+        super().__init__(mask)
+        self.added = []
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            self.added += [i for i in range(*key.indices(len(self))) if not self[i]]
+        elif value and not self[key]:
+            self.added.append(key)
+        super().__setitem__(key, value)
 
 
 class MazeSolverV2:
     """Class handles the image parsing to binary instructions."""
 
-    def __init__(self, path=BITSTREAM_PATH):
-        """Initialise Read Write Files"""
+    def __init__(self, path=BITSTREAM_PATH, planner='auto', index=None, cache=None, unreachable='skip', instrument=None):
+        """
+        Initialise Read Write Files, planner picks the MazePlanner strategy.
+        index picks one maze of a .mzc container or concatenated archive, memory mapped.
+        cache is an optional PathCache consulted before every leg is searched.
+        unreachable: skip leaves walled off gems, monsters and hearts out of the route, raise rejects the maze.
+        instrument is an optional Instrument counting what every step does, see maze_instrument.
+        """
 
         self.script_dir = os.path.dirname(__file__)
         self.bin_path = os.path.join(self.script_dir, path)
-        self.grid = [[0 for i in range(30)] for i in range(30)]
+        self.width, self.height = 30, 30
+        self.grid = MazeGrid(self.width, self.height)
         self.start_pos = None
         self.end_pos = None
-        self.frames = []
+        self.planner = planner
+        self.cache = cache
+        self.unreachable = unreachable
+        self.instrument = instrument
+        self.skipped = {}
         self.entities = {
             'gems': [],
             'monsters': [],
             'hearts': []
         }
-        self._parse_bin()
+        if index is None:
+            self._parse_bin()
+        else:
+            with open_archive(self.bin_path) as archive:
+                self.grid, self.start_pos, self.end_pos, self.entities = archive[index]
+            self.width, self.height = self.grid.width, self.grid.height
+        self.components = self.grid.components()
 
     def _parse_bin(self):
-        """Parse instructions to grid map"""
+        """
+        Parse instructions to grid map, the first maze only when the file is an archive.
+        It ends at END_MAZE, or for a legacy maze at its row 29 right half BUILD_WALL, same as MazeArchive.
+        """
 
         with open(self.bin_path, "rb") as f:
             data = f.read()
             count = len(data) // 4
             instructions = struct.unpack(f'>{count}I', data)
 
+        row = 0
+        runs = None
+        framed = False
         for instr in instructions:
             opcode = instr & 0xF
             match opcode:
@@ -57,27 +112,76 @@ class MazeSolverV2:
                     for i in range(15):
                         if wall_data & (1 << (14 - i)):
                             x = i if half == 0 else i + 15
-                            if 0 <= x < 30 and 0 <= y < 30:
-                                self.grid[y][x] = 1
+                            self.grid.set_wall(x, y)
+                    if not framed and y == 29 and half != 0: #Last instruction of a legacy maze
+                        break
 
                 case 0x2: #Place Entity
                     y = (instr >> 24) & 0xFF
                     x = (instr >> 16) & 0xFF
-                    funct1 = (instr >> 12) & 0xF
-                    funct2 = (instr >> 8) & 0xF
-                    match funct1:
-                        case 0x1: #Start Point / End Point
-                            match funct2:
-                                case 0x1: #Start Point
-                                    self.start_pos = (x, y)
-                                case 0x2: #End Point
-                                    self.end_pos = (x, y)
-                        case 0x2: #Hearts
-                            self.entities['hearts'].append((x,y))
-                        case 0x4: #Gems
-                            self.entities['gems'].append((x,y))
-                        case 0x8: #Monsters
-                            self.entities['monsters'].append((x,y))
+                    self._place_entity(instr, x, y)
+
+                case 0x3: #Maze Header (Extended)
+                    self.width = (instr >> 20) & 0xFFF
+                    self.height = (instr >> 8) & 0xFFF
+                    self.grid = MazeGrid(self.width, self.height)
+                    framed = True
+                    version = (instr >> 4) & 0xF
+                    runs = np.zeros(self.width * self.height, dtype=np.uint8)
+                    pos, value = 0, 0
+
+                case 0x4: #Set Row (Extended)
+                    row = (instr >> 16) & 0xFFFF
+
+                case 0x5: #Make Wall Segment (Extended)
+                    seg = (instr >> 4) & 0xFFF
+                    wall_data = (instr >> 16) & 0xFFFF
+                    for i in range(16):
+                        if wall_data & (1 << (15 - i)):
+                            self.grid.set_wall(seg * 16 + i, row)
+
+                case 0x6: #Place Entity (Extended)
+                    self._place_entity(instr, (instr >> 16) & 0xFFFF, row)
+
+                case 0x7 if runs is not None: #Wall Runs (Run Length), nine 3 bit runs alternating open/wall
+                    for i in range(9):
+                        length = (instr >> (29 - 3 * i)) & 0x7
+                        runs[pos:pos + length] = value
+                        pos, value = pos + length, value ^ 1
+
+                case 0x8 if runs is not None: #Wall Run Long (Run Length)
+                    length, value = instr >> 5, (instr >> 4) & 0x1
+                    runs[pos:pos + length] = value
+                    pos, value = pos + length, value ^ 1
+
+                case 0xF: #End Maze (Extended)
+                    break
+
+        if runs is not None and runs.any():
+            walls = runs.reshape(self.height, self.width)
+            if version == 0x3: #Runs were over each row XOR the row above
+                walls = np.bitwise_xor.accumulate(walls, axis=0)
+            for y, x in zip(*np.nonzero(walls)):
+                self.grid.set_wall(int(x), int(y))
+
+    def _place_entity(self, instr, x, y):
+        """Decodes FUNCT1/FUNCT2 shared by both place entity opcodes"""
+
+        funct1 = (instr >> 12) & 0xF
+        funct2 = (instr >> 8) & 0xF
+        match funct1:
+            case 0x1: #Start Point / End Point
+                match funct2:
+                    case 0x1: #Start Point
+                        self.start_pos = (x, y)
+                    case 0x2: #End Point
+                        self.end_pos = (x, y)
+            case 0x2: #Hearts
+                self.entities['hearts'].append((x,y))
+            case 0x4: #Gems
+                self.entities['gems'].append((x,y))
+            case 0x8: #Monsters
+                self.entities['monsters'].append((x,y))
     
     def _draw_submaze(self, draw, offset_x, offset_y, scale, visited, path, title, step_text, time, goal_idx):
         """Handles image scaling, draws path into frame."""
@@ -89,16 +193,17 @@ class MazeSolverV2:
         }
 
         draw.text((offset_x + 40, offset_y - 30), title, fill=(0,0,0))
-        draw.text((offset_x + 40, offset_y + (30*scale) + 10), f"Steps: {step_text}", fill=(100,100,100))
-        draw.text((offset_x + 120, offset_y + (30*scale) + 10), f"Path Length: {len(path)}", fill=(100,100,100))
-        draw.text((offset_x + 240, offset_y + (30*scale) + 10), f"Elapsed Time: {time*1000:.2f}ms", fill=(100,100,100))
+        draw.text((offset_x + 40, offset_y + (self.height*scale) + 10), f"Steps: {step_text}", fill=(100,100,100))
+        draw.text((offset_x + 120, offset_y + (self.height*scale) + 10), f"Path Length: {len(path)}", fill=(100,100,100))
+        draw.text((offset_x + 240, offset_y + (self.height*scale) + 10), f"Elapsed Time: {time*1000:.2f}ms", fill=(100,100,100))
         
         #Draw Walls
-        for y in range(30):
-            for x in range(30):
+        for y in range(self.height):
+            for x in range(self.width):
                 rect = [offset_x + x*scale, offset_y + y*scale, offset_x + (x+1)*scale, offset_y + (y+1)*scale]
-                if self.grid[y][x] == 1: draw.rectangle(rect, fill=(0,0,0))
-                elif (x, y) in visited: draw.rectangle(rect, fill=(200, 255, 200))
+                cell = self.grid.index(x, y)
+                if self.grid.cells[cell] == 1: draw.rectangle(rect, fill=(0,0,0))
+                elif visited[cell]: draw.rectangle(rect, fill=(200, 255, 200))
         
         #Draw Entities
         for key, color in entity_colors.items():
@@ -107,7 +212,7 @@ class MazeSolverV2:
                 draw.rectangle(rect, fill=color)
         
         #Draw Path
-        for x, y in path:
+        for x, y in map(self.grid.coords, path):
             rect = [offset_x + x*scale, offset_y + y*scale, offset_x + (x+1)*scale, offset_y + (y+1)*scale]
             draw.rectangle(rect, fill=(255, 0, 0))
 
@@ -136,184 +241,791 @@ class MazeSolverV2:
         Start and End Point
         Monsters
         Gems
-        Hearts (Minimum required by _calculate_hearts)
-
-        Ordered by Manhatten Distance
-        """
-        current_hp = 6
-        current_pos = self.start_pos
-        self.goal_path = []
-        objectives = self.entities['gems'][:] + self.entities['monsters'][:]
-        hearts_available = self.entities['hearts'][:]
-
-        while objectives:
-            objectives.sort(key=lambda p: abs(p[0] - current_pos[0]) + abs(p[1] - current_pos[1]))
-            target = objectives[0]
-
-            if target in self.entities['monsters'] and current_hp <= 1:
-                hearts_available.sort(key=lambda p: abs(p[0] - current_pos[0]) + abs(p[1] - current_pos[1]))
-                heart_target = hearts_available.pop(0)
-                self.goal_path.append(heart_target)
-                current_pos = heart_target
-                current_hp += 2
-            
-            target = objectives.pop(0)
-            self.goal_path.append(target)
-            current_pos = target
-            
-            if target in self.entities['monsters']:
-                current_hp -= 1
-        
-        self.goal_path.append(self.end_pos)
+        Hearts (Only when HP would otherwise run out)
+
+        Ordered by MazePlanner using true shortest path distances and self.planner strategy
+        Entities outside the start point's component are handled per self.unreachable,
+        the ones left out are kept in self.skipped
+        """
+        if not self._connected(self.start_pos, self.end_pos):
+            raise ValueError(f"End Point {self.end_pos} is walled off from Start Point {self.start_pos}")
+        entities = {}
+        for kind, points in self.entities.items():
+            entities[kind] = [p for p in points if self._connected(self.start_pos, p)]
+            if len(entities[kind]) < len(points):
+                if self.unreachable == 'raise':
+                    raise ValueError(f"{len(points) - len(entities[kind])} {kind} walled off from Start Point {self.start_pos}")
+                self.skipped[kind] = [p for p in points if p not in entities[kind]]
 
-    def solve_maze(self):
-        """Main Function with BFS/DFS/A* Logic"""
+        self.goal_path = MazePlanner(self.grid).plan(
+            self.start_pos,
+            entities['gems'],
+            entities['monsters'],
+            entities['hearts'],
+            self.end_pos,
+            self.planner
+        )
 
-        self._get_path()
+    def _connected(self, a, b):
+        """O(1) reachability of (x, y) b from (x, y) a through the component labels"""
 
-        #Init trackers [Current Target, Path, Visited, Queue, Done, Elapsed Time, Steps]
-        bfs = [0, [self.start_pos], {self.start_pos}, deque([(self.start_pos, [self.start_pos])]), False, 0, 0]
-        dfs = [0, [self.start_pos], {self.start_pos}, deque([(self.start_pos, [self.start_pos])]), False, 0, 0]
-        hugleft = [0, [self.start_pos], {self.start_pos}, self.start_pos, False, 0, 0, (0, 1)]
-        start_h = abs(self.goal_path[0][0]-self.start_pos[0]) + abs(self.goal_path[0][1]-self.start_pos[1])
-        astar = [0, [self.start_pos], {self.start_pos: 0}, [(start_h, self.start_pos, [self.start_pos])], False, 0, 0]
-
-        total_steps = 0
-        scale = 12
-        maze_w, padding = 30 * scale, 40
-        canvas_w, canvas_h = (maze_w * 4) + (padding * 4), maze_w + 100
-
-        while not (bfs[4] and dfs[4] and astar[4] and hugleft[4]):
-            total_steps += 1
-
-            if not hugleft[4]:
-                hugleft[6] += 1
-                t0 = time.time()
-
-                cx, cy = hugleft[3]
-                cdx, cdy = hugleft[7]
-                path = hugleft[1]
-
-                directions = [
-                    (cdy, -cdx),  #Left
-                    (cdx, cdy),   #Front
-                    (-cdy, cdx),  #Right
-                    (-cdx, -cdy)  #Back
-                ]
-
-                for dx, dy in directions:
-                    nx, ny = cx + dx, cy + dy
-                    if 0 <= nx < 30 and 0 <= ny < 30 and self.grid[ny][nx] == 0:
-                        new_pos = (nx, ny)
-                        hugleft[3] = new_pos
-                        hugleft[7] = (dx, dy)
-                        hugleft[1].append(new_pos)
-                        hugleft[2].add(new_pos)
-                        
-                        for i in range(hugleft[0], len(self.goal_path)):
-                            if new_pos == self.goal_path[i]:
-                                hugleft[0] = i + 1
-                                if hugleft[0] >= len(self.goal_path):
-                                    hugleft[4] = True
-                                break
-                        break
-                hugleft[5] += time.time() - t0
-            
+        label = self.components[self.grid.index(*a)]
+        return label != -1 and label == self.components[self.grid.index(*b)]
+
+    def _init_trackers(self, algorithms=None):
+        """
+        Tracker per algorithm, keyed by display title. All positions are MazeGrid cell ids.
+        [Current Target, Path, Visited, Queue, Done, Elapsed Time, Steps, Visited (Previous Legs), Parents]
+        Visited is a per-cell byte mask for the current leg.
+        Hug Left keeps its current cell in Queue and its heading in place of Parents.
+        Parents is a flat array of predecessor cell ids for the current leg, -1 if unset.
+        A-Star and JPS append a G-Score array, -1 if unset. JPS Parents hold the previous jump point.
+        Bidirectional trackers hold (Forward, Backward) pairs in Queue, Parents and G-Score,
+        and append [Best Meeting Length, Meeting Cell], see _bidir_leg.
+        Multi-BFS keeps {Root: [Distances, Parents, Queue]} in Queue and its Visited mask spans every leg.
+        algorithms keeps only the named trackers, in the given order.
+        Raises ValueError if a goal is walled off, every search would run forever.
+        """
+        start = self.grid.index(*self.start_pos)
+        walled = [p for p in self.goal_path if not self._connected(self.start_pos, p)]
+        if walled:
+            raise ValueError(f"Goals {walled} are walled off from Start Point {self.start_pos}")
+        self.goal_ids = [self.grid.index(*p) for p in self.goal_path]
+        #A wall follower repeats a (cell, heading) state within 4 moves per open cell, or it never arrives
+        self.hug_limit = 4 * int(np.count_nonzero(self.components == self.components[start])) * len(self.goal_ids)
+        self.goal_cells = set(self.goal_ids)
+        self.grid_key = self.grid.digest() if self.cache is not None else None
+        self.cached_legs = {}
+        self.leg_keys = {}
+        trackers = {}
+        for name in algorithms or ALGORITHMS:
+            trackers[name] = [0, [start], self.grid.new_mask(), None, False, 0, 0, 0]
+            self._start_leg(name, trackers[name])
+        return trackers
+
+    def _reset_leg(self, name, tracker, cell):
+        """Fresh search state (Queue and everything from Parents on) for a leg starting at cell, returns the cells queued"""
+
+        tracker[2][cell] = 1
+        match name:
+            case 'Hug Left':
+                tracker[3], tracker[8:] = cell, [(0, 1)]
+                return 0
+            case 'BFS' | 'Greedy DFS':
+                tracker[3], tracker[8:] = deque([cell]), [self._new_parents()]
+                return 1
+            case 'A-Star' | 'JPS':
+                g = self._new_parents()
+                g[cell] = 0
+                tracker[3], tracker[8:] = [(self._manhattan(cell, self.goal_ids[tracker[0]]), cell)], [self._new_parents(), g]
+                return 1
+            case 'Bi-BFS' | 'Bi-A-Star':
+                tracker[8:] = [None, None, None]
+                self._bidir_leg(tracker, cell, name == 'Bi-A-Star')
+                return 2
+            case 'Multi-BFS':
+                tracker[3] = tracker[3] or {}
+                return 0
+            case _:
+                raise ValueError(f"Unknown algorithm: {name}")
+
+    def _start_leg(self, name, tracker):
+        """Takes every cached leg from the end of the path, then resets the search for the next one, returns the cells queued"""
+
+        self._cached_legs(name, tracker)
+        if tracker[4]:
+            return 0
+        if self.cache is not None:
+            self.leg_keys[name] = self._cache_key(name, tracker)
+        return self._reset_leg(name, tracker, tracker[1][-1])
+
+    def _next_leg(self, name, tracker):
+        """Resets Visited and the search state after a goal, so the next leg starts from the path end, returns the cells queued"""
+
+        tracker[7] += tracker[2].count(1)
+        tracker[2] = self.grid.new_mask()
+        return self._start_leg(name, tracker)
+
+    def _cache_key(self, name, tracker):
+        """
+        Key of the leg tracker is about to search, everything its path depends on.
+        Each algorithm keeps its own legs (shortest paths tie break differently), the skip ahead
+        searches are keyed by every remaining goal since any of them can end the leg.
+        """
+        source = tracker[1][-1]
+        if name in SKIP_AHEAD:
+            return (self.grid_key, name, source, tuple(self.goal_ids[tracker[0]:]))
+        return (self.grid_key, name, source, self.goal_ids[tracker[0]])
+
+    def _cached_legs(self, name, tracker):
+        """
+        Appends cached legs to the path while the cache has the next one, True if any were taken.
+        Multi-BFS is never cached: a served leg would leave the next leg without the tree it extends.
+        """
+        if self.cache is None or name in UNCACHED:
+            return False
+        taken = False
+        while not tracker[4]:
+            leg = self.cache.get(self._cache_key(name, tracker))
+            if leg is None:
+                break
+            tracker[1] = tracker[1] + leg
+            self._reached_goal(tracker, tracker[1][-1])
+            self.cached_legs[name] = self.cached_legs.get(name, 0) + 1
+            taken = True
+        return taken
+
+    def _end_leg(self, name, tracker, path):
+        """Sets the path extended by a finished leg and stores the leg in the cache"""
+
+        if self.cache is not None and name not in UNCACHED:
+            self.cache.put(self.leg_keys[name], path[len(tracker[1]):])
+        tracker[1] = path
+
+    def _new_parents(self):
+        """Empty predecessor array, one int per cell"""
+
+        return array('i', [-1]) * self.grid.size
+
+    def _manhattan(self, a, b):
+        """Manhattan distance between two cell ids"""
+
+        ay, ax = divmod(a, self.grid.stride)
+        by, bx = divmod(b, self.grid.stride)
+        return abs(ax - bx) + abs(ay - by)
+
+    def _trace_leg(self, tracker, cell):
+        """Extends the tracker path from the leg origin to cell by following Parents"""
+
+        parents = tracker[8]
+        leg = []
+        while parents[cell] != -1:
+            leg.append(cell)
+            cell = parents[cell]
+        leg.reverse()
+        return tracker[1] + leg
+
+    def _reached_goal(self, tracker, cell):
+        """Advances Current Target if cell is any remaining goal, True when a goal was hit"""
+
+        for i in range(tracker[0], len(self.goal_ids)):
+            if cell == self.goal_ids[i]:
+                tracker[0] = i + 1
+                if tracker[0] >= len(self.goal_ids):
+                    tracker[4] = True
+                return True
+        return False
+
+    def _step_hugleft(self, hugleft):
+        """One move of the left wall follower, returns (Cell Moved From, 0, 0)"""
+
+        hugleft[6] += 1
+        cell = hugleft[3]
+        cdx, cdy = hugleft[8]
+        cells = self.grid.cells
+
+        directions = [
+            (cdy, -cdx),  #Left
+            (cdx, cdy),   #Front
+            (-cdy, cdx),  #Right
+            (-cdx, -cdy)  #Back
+        ]
+
+        for dx, dy in directions:
+            n = cell + dy * self.grid.stride + dx
+            if not cells[n]:
+                hugleft[3] = n
+                hugleft[8] = (dx, dy)
+                hugleft[1].append(n)
+                hugleft[2][n] = 1
+                if n in self.goal_cells:
+                    self._reached_goal(hugleft, n)
+                break
+        if hugleft[6] >= self.hug_limit:
+            hugleft[4] = True   #Circling, give up with the goals left unreached
+        return cell, 0, 0
+
+    def _step_bfs(self, bfs):
+        """One dequeue of the FIFO search, returns (Popped Cell or None, 0, Pushes)"""
+
+        bfs[6] += 1
+        if not bfs[3]:
+            return None, 0, 0
+        pushes = 0
+        cell = bfs[3].popleft()
+
+        if cell in self.goal_cells and self._reached_goal(bfs, cell):
+            self._end_leg('BFS', bfs, self._trace_leg(bfs, cell))
             if not bfs[4]:
-                bfs[6] += 1
-                t0 = time.time()
-                if bfs[3]:
-                    (cx, cy), path = bfs[3].popleft()
-                    
-                    for i in range(bfs[0], len(self.goal_path)):
-                        if (cx, cy) == self.goal_path[i]:
-                            bfs[0] = i + 1
-                            bfs[1] = path
-                            if bfs[0] >= len(self.goal_path): 
-                                bfs[4] = True
-                            else:
-                                bfs[3] = deque([( (cx, cy), path )])
-                                bfs[2] = {(cx, cy)}
-                            break
-                    
-                    if not bfs[4]:
-                        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                            nx, ny = cx + dx, cy + dy
-                            if 0 <= nx < 30 and 0 <= ny < 30 and self.grid[ny][nx] == 0 and (nx, ny) not in bfs[2]:
-                                bfs[2].add((nx, ny))
-                                bfs[3].append(((nx, ny), path + [(nx, ny)]))
-                bfs[5] += time.time() - t0
+                pushes = self._next_leg('BFS', bfs)
+                cell = bfs[1][-1]
+
+        if not bfs[4]:
+            cells, visited, parents = self.grid.cells, bfs[2], bfs[8]
+            for offset in self.grid.offsets:
+                n = cell + offset
+                if not cells[n] and not visited[n]:
+                    visited[n] = 1
+                    parents[n] = cell
+                    bfs[3].append(n)
+                    pushes += 1
+        return cell, 0, pushes
 
+    def _step_dfs(self, dfs):
+        """One pop of the greedy LIFO search, returns (Popped Cell or None, 0, Pushes)"""
+
+        dfs[6] += 1
+        if not dfs[3]:
+            return None, 0, 0
+        pushes = 0
+        cell = dfs[3].pop()
+        if cell in self.goal_cells and self._reached_goal(dfs, cell):
+            self._end_leg('Greedy DFS', dfs, self._trace_leg(dfs, cell))
             if not dfs[4]:
-                dfs[6] += 1
-                t0 = time.time()
-                if dfs[3]:
-                    (cx, cy), path = dfs[3].pop()
-                    for i in range(dfs[0], len(self.goal_path)):
-                        if (cx, cy) == self.goal_path[i]:
-                            dfs[0] = i + 1
-                            dfs[1] = path
-                            if dfs[0] >= len(self.goal_path): dfs[4] = True
-                            else:
-                                dfs[3] = deque([( (cx, cy), path )])
-                                dfs[2] = {(cx, cy)}
-                            break
-                    if not dfs[4]:
-                        neighbors = []
-                        target = self.goal_path[dfs[0]]
-                        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                            nx, ny = cx + dx, cy + dy
-                            if 0 <= nx < 30 and 0 <= ny < 30 and self.grid[ny][nx] == 0 and (nx, ny) not in dfs[2]:
-                                neighbors.append((nx, ny))
-                        neighbors.sort(key=lambda p: abs(p[0]-target[0]) + abs(p[1]-target[1]), reverse=True)
-                        for n in neighbors:
-                            dfs[2].add(n); dfs[3].append((n, path + [n]))
-                dfs[5] += time.time() - t0
+                pushes = self._next_leg('Greedy DFS', dfs)
+                cell = dfs[1][-1]
+        if not dfs[4]:
+            cells, visited, parents, stride = self.grid.cells, dfs[2], dfs[8], self.grid.stride
+            ty, tx = divmod(self.goal_ids[dfs[0]], stride)
+            neighbors = [cell + offset for offset in self.grid.offsets if not cells[cell + offset] and not visited[cell + offset]]
+            neighbors.sort(key=lambda n: abs(n // stride - ty) + abs(n % stride - tx), reverse=True)
+            for n in neighbors:
+                visited[n] = 1
+                parents[n] = cell
+                dfs[3].append(n)
+            pushes += len(neighbors)
+        return cell, 0, pushes
+
+    def _step_astar(self, astar):
+        """One heap pop of A-Star, returns (Popped Cell or None, 0, Pushes)"""
 
+        astar[6] += 1
+        if not astar[3]:
+            return None, 0, 0
+        pushes = 0
+        f, cell = heapq.heappop(astar[3])
+        if cell in self.goal_cells and self._reached_goal(astar, cell):
+            self._end_leg('A-Star', astar, self._trace_leg(astar, cell))
             if not astar[4]:
-                astar[6] += 1
-                t0 = time.time()
-                if astar[3]:
-                    f, (cx, cy), path = heapq.heappop(astar[3])
-                    for i in range(astar[0], len(self.goal_path)):
-                        if (cx, cy) == self.goal_path[i]:
-                            astar[0] = i + 1
-                            astar[1] = path
-                            if astar[0] >= len(self.goal_path): astar[4] = True
-                            else:
-                                target = self.goal_path[astar[0]]
-                                astar[2] = {(cx, cy): 0}
-                                h = abs(target[0]-cx) + abs(target[1]-cy)
-                                astar[3] = [(h, (cx, cy), path)]
-                            break
-                    if not astar[4]:
-                        target = self.goal_path[astar[0]]
-                        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                            nx, ny = cx+dx, cy+dy
-                            if 0 <= nx < 30 and 0 <= ny < 30 and self.grid[ny][nx] == 0:
-                                new_g = astar[2][(cx, cy)] + 1
-                                if (nx, ny) not in astar[2] or new_g < astar[2][(nx, ny)]:
-                                    astar[2][(nx, ny)] = new_g
-                                    h = abs(target[0]-nx) + abs(target[1]-ny)
-                                    heapq.heappush(astar[3], (new_g+h, (nx, ny), path+[(nx, ny)]))
-                astar[5] += time.time() - t0
-
-            frame = Image.new('RGB', (canvas_w, canvas_h), (240, 240, 240))
-            draw = ImageDraw.Draw(frame)
-            self._draw_submaze(draw, 0*(maze_w+padding)+padding, 50, scale, hugleft[2], hugleft[1], "Hug Left", hugleft[6], hugleft[5], hugleft[0])
-            self._draw_submaze(draw, 1*(maze_w+padding)+padding, 50, scale, bfs[2], bfs[1], "BFS", bfs[6], bfs[5], bfs[0])
-            self._draw_submaze(draw, 2*(maze_w+padding)+padding, 50, scale, dfs[2], dfs[1], "Greedy DFS", dfs[6], dfs[5], dfs[0])
-            self._draw_submaze(draw, 3*(maze_w+padding)+padding, 50, scale, set(astar[2].keys()) if isinstance(astar[2], dict) else astar[2], astar[1], "A-Star", astar[6], astar[5], astar[0])
-            self.frames.append(frame)
-        
-        #Generate 30 frames to freeze at the end
-        for i in range(30):
-            self.frames.append(frame)
-        
-        self.frames[0].save(os.path.join(self.script_dir, GIF_PATH),
-            save_all=True, append_images=self.frames[1:], duration=40, loop=0)
+                pushes = self._next_leg('A-Star', astar)
+                cell = astar[1][-1]
+        if not astar[4]:
+            cells, visited, parents, g, stride = self.grid.cells, astar[2], astar[8], astar[9], self.grid.stride
+            ty, tx = divmod(self.goal_ids[astar[0]], stride)
+            new_g = g[cell] + 1
+            for offset in self.grid.offsets:
+                n = cell + offset
+                if not cells[n] and (g[n] == -1 or new_g < g[n]):
+                    g[n] = new_g
+                    visited[n] = 1
+                    parents[n] = cell
+                    ny, nx = divmod(n, stride)
+                    heapq.heappush(astar[3], (new_g + abs(nx - tx) + abs(ny - ty), n))
+                    pushes += 1
+        return cell, 0, pushes
+
+    def _jump_stops(self):
+        """
+        Per-cell byte masks for horizontal JPS scans, keyed by direction (+1 / -1).
+        1 where a scan moving that way must stop: walls and cells with a forced neighbour
+        (the wall above or below the previous cell ends here). Built once per maze.
+        """
+        if not hasattr(self, '_stops'):
+            stride = self.grid.stride
+            wall = np.frombuffer(self.grid.cells, dtype=np.uint8).astype(bool)
+            self._stops = {}
+            for d in (1, -1):
+                #Roll wraps only onto border cells, which are walls and stop anyway
+                forced = (np.roll(wall, d + stride) & ~np.roll(wall, stride)) | (np.roll(wall, d - stride) & ~np.roll(wall, -stride))
+                self._stops[d] = bytearray((wall | forced).astype(np.uint8).tobytes())
+        return self._stops
+
+    def _jump(self, cell, d, goal, visited):
+        """
+        Scans from cell in direction d (a grid offset) and returns the next jump point, -1 if none.
+        Horizontal scans stop at the goal or beside a wall that just ended (forced neighbour),
+        found with one bytearray search over _jump_stops.
+        Vertical scans stop at the goal or where a horizontal scan finds a jump point.
+        Every scanned cell is marked in visited.
+        """
+        cells = self.grid.cells
+        if d == 1 or d == -1:
+            stops = self._jump_stops()[d]
+            if d == 1:
+                m = stops.find(1, cell + 1)
+                if cell < goal <= m:
+                    m = goal
+                lo, hi = cell + 1, m + 1
+            else:
+                m = stops.rfind(1, 0, cell)
+                if m <= goal < cell:
+                    m = goal
+                lo, hi = m, cell
+            wall = cells[m] == 1
+            if wall:
+                lo, hi = (lo, hi - 1) if d == 1 else (lo + 1, hi)
+            visited[lo:hi] = b'\x01' * (hi - lo)
+            return -1 if wall else m
+        n = cell
+        while True:
+            n += d
+            if cells[n]:
+                return -1
+            visited[n] = 1
+            if n == goal or self._jump(n, 1, goal, visited) != -1 or self._jump(n, -1, goal, visited) != -1:
+                return n
+
+    def _trace_jumps(self, tracker, cell):
+        """Extends the tracker path to cell, filling in the straight runs between jump points"""
+
+        parents, stride = tracker[8], self.grid.stride
+        leg = []
+        while parents[cell] != -1:
+            prev = parents[cell]
+            d = (1 if cell > prev else -1) * (1 if cell // stride == prev // stride else stride)
+            leg += range(cell, prev, -d)
+            cell = prev
+        leg.reverse()
+        return tracker[1] + leg
+
+    def _step_jps(self, jps):
+        """
+        One heap pop of Jump Point Search, successors are the jump points in every direction but back.
+        Returns (Popped Cell or None, 0, Pushes).
+        """
+        jps[6] += 1
+        if not jps[3]:
+            return None, 0, 0
+        f, cell = heapq.heappop(jps[3])
+        goal = self.goal_ids[jps[0]]
+        if cell == goal:
+            self._reached_goal(jps, cell)
+            self._end_leg('JPS', jps, self._trace_jumps(jps, cell))
+            return cell, 0, 0 if jps[4] else self._next_leg('JPS', jps)
+        parents, g, stride = jps[8], jps[9], self.grid.stride
+        parent = parents[cell]
+        back = 0
+        if parent != -1:
+            back = (-1 if cell > parent else 1) * (1 if cell // stride == parent // stride else stride)
+        ty, tx = divmod(goal, stride)
+        pushes = 0
+        for offset in self.grid.offsets:
+            if offset == back:
+                continue
+            n = self._jump(cell, offset, goal, jps[2])
+            if n == -1:
+                continue
+            new_g = g[cell] + self._manhattan(cell, n)
+            if g[n] == -1 or new_g < g[n]:
+                g[n] = new_g
+                parents[n] = cell
+                ny, nx = divmod(n, stride)
+                heapq.heappush(jps[3], (new_g + abs(nx - tx) + abs(ny - ty), n))
+                pushes += 1
+        return cell, 0, pushes
+
+    def _bidir_leg(self, tracker, source, astar):
+        """
+        Starts a leg searched from both source and the current target.
+        BFS keeps a FIFO per side, A-Star a heap per side with Manhattan distance to the opposite end.
+        """
+        target = self.goal_ids[tracker[0]]
+        if astar:
+            h = self._manhattan(source, target)
+            tracker[3] = ([(h, source)], [(h, target)])
+        else:
+            tracker[3] = (deque([source]), deque([target]))
+        tracker[8] = (self._new_parents(), self._new_parents())
+        tracker[9] = (self._new_parents(), self._new_parents())
+        tracker[9][0][source] = 0
+        tracker[9][1][target] = 0
+        tracker[10] = [0 if source == target else INF, source]
+        tracker[2][source] = tracker[2][target] = 1
+
+    def _step_bidir(self, bi, astar):
+        """
+        One pop from the smaller frontier of a bidirectional search.
+        Every relaxed cell already reached by the other side is a candidate meeting point.
+        The leg ends once no unexpanded cell can beat the best meeting: for BFS when the two
+        frontier depths sum to it, for A-Star when either side's lowest F-Score reaches it.
+        Returns (Popped Cell or None, Side, Pushes), no cell on the step that joins the leg.
+        """
+        bi[6] += 1
+        (fq, bq), g, best = bi[3], bi[9], bi[10]
+        if best[0] < INF:
+            if astar:
+                bound = max(fq[0][0] if fq else INF, bq[0][0] if bq else INF)
+            else:
+                bound = (g[0][fq[0]] if fq else INF) + (g[1][bq[0]] if bq else INF)
+            if best[0] <= bound:
+                return None, 0, self._bidir_finish(bi, astar)
+
+        side = 0 if fq and (len(fq) <= len(bq) or not bq) else 1
+        queue = bi[3][side]
+        if not queue:
+            return None, side, 0
+        cell = heapq.heappop(queue)[1] if astar else queue.popleft()
+        cells, visited, stride = self.grid.cells, bi[2], self.grid.stride
+        mine, other, prev = g[side], g[1 - side], bi[8][side]
+        if astar:
+            #Forward heads for the target, backward for the leg origin (last cell of the path)
+            gy, gx = divmod(self.goal_ids[bi[0]] if side == 0 else bi[1][-1], stride)
+        new_g = mine[cell] + 1
+        pushes = 0
+        for offset in self.grid.offsets:
+            n = cell + offset
+            if cells[n] or not (mine[n] == -1 or new_g < mine[n]):
+                continue
+            mine[n] = new_g
+            prev[n] = cell
+            visited[n] = 1
+            if other[n] != -1 and new_g + other[n] < best[0]:
+                best[0], best[1] = new_g + other[n], n
+            if astar:
+                ny, nx = divmod(n, stride)
+                heapq.heappush(queue, (new_g + abs(nx - gx) + abs(ny - gy), n))
+            else:
+                queue.append(n)
+            pushes += 1
+        return cell, side, pushes
+
+    def _bidir_finish(self, bi, astar):
+        """Joins both half paths through the meeting cell and moves on to the next target, returns the cells queued"""
+
+        forward, backward = bi[8]
+        source, target, meet = bi[1][-1], self.goal_ids[bi[0]], bi[10][1]
+        leg = []
+        cell = meet
+        while cell != source:
+            leg.append(cell)
+            cell = forward[cell]
+        leg.reverse()
+        cell = meet
+        while cell != target:
+            cell = backward[cell]
+            leg.append(cell)
+        name = 'Bi-A-Star' if astar else 'Bi-BFS'
+        self._end_leg(name, bi, bi[1] + leg)
+        self._reached_goal(bi, target)
+        return 0 if bi[4] else self._next_leg(name, bi)
+
+    def _tree(self, trees, root):
+        """BFS tree kept across legs, [Distances, Parents, Queue], created on first use"""
+
+        if root not in trees:
+            dist = self._new_parents()
+            dist[root] = 0
+            trees[root] = [dist, self._new_parents(), deque([root])]
+        return trees[root]
+
+    def _step_multi(self, multi):
+        """
+        One dequeue of a BFS tree that is kept after its leg.
+        Distances on the grid are symmetric, so a tree rooted at either end of a leg finds it.
+        A leg grows the tree of its source if one exists, else a new tree rooted at its target,
+        which the next leg (starting there) then extends instead of starting over.
+        Returns (Popped Cell or None, 0, Pushes), a new tree counts its root as a push.
+        """
+        multi[6] += 1
+        source, target = multi[1][-1], self.goal_ids[multi[0]]
+        trees = multi[3]
+        root, other = (source, target) if source in trees else (target, source)
+        pushes = int(root not in trees)
+        dist, parents, queue = self._tree(trees, root)
+
+        cell = None
+        if dist[other] == -1 and queue:
+            cell = queue.popleft()
+            cells, visited, d = self.grid.cells, multi[2], dist[cell] + 1
+            for offset in self.grid.offsets:
+                n = cell + offset
+                if not cells[n] and dist[n] == -1:
+                    dist[n] = d
+                    parents[n] = cell
+                    visited[n] = 1
+                    queue.append(n)
+                    pushes += 1
+        if dist[other] == -1:
+            return cell, 0, pushes
+
+        #Parents run towards the root, reverse the walk when the root is the source
+        chain = [other]
+        while chain[-1] != root:
+            chain.append(parents[chain[-1]])
+        leg = chain[-2::-1] if root == source else chain[1:]
+        self._end_leg('Multi-BFS', multi, multi[1] + leg)
+        self._reached_goal(multi, target)
+        return cell, 0, pushes
+
+    def _step(self, name, tracker):
+        """Single step of the algorithm named by its title, through the Instrument if there is one"""
+
+        if self.instrument:
+            self.instrument.step(self, name, tracker)
+        else:
+            self._advance(name, tracker)
+
+    def _advance(self, name, tracker):
+        """
+        Dispatches a single step to the algorithm named by its title.
+        Returns what the step did as (Expanded Cell or None, Side, Pushes), Side is 1 for a
+        backward expansion and Pushes counts every cell queued, including a new leg's seeds.
+        """
+        match name:
+            case 'Hug Left':
+                return self._step_hugleft(tracker)
+            case 'BFS':
+                return self._step_bfs(tracker)
+            case 'Greedy DFS':
+                return self._step_dfs(tracker)
+            case 'A-Star':
+                return self._step_astar(tracker)
+            case 'JPS':
+                return self._step_jps(tracker)
+            case 'Bi-BFS':
+                return self._step_bidir(tracker, False)
+            case 'Bi-A-Star':
+                return self._step_bidir(tracker, True)
+            case 'Multi-BFS':
+                return self._step_multi(tracker)
+
+    def _results(self, trackers):
+        """Structured summary per algorithm, with the Instrument counters under 'stats'"""
+
+        results = {
+            name: {
+                'path': [self.grid.coords(cell) for cell in tracker[1]],
+                'steps': tracker[6],
+                'visited': tracker[7] + tracker[2].count(1),
+                'elapsed': tracker[5],
+                'complete': tracker[0] >= len(self.goal_ids)
+            }
+            for name, tracker in trackers.items()
+        }
+        if self.cache is not None:
+            for name in trackers:
+                results[name]['cached_legs'] = self.cached_legs.get(name, 0)
+        if self.instrument:
+            for name, tracker in trackers.items():
+                results[name]['stats'] = self.instrument.summary(self, name, tracker)
+        return results
+
+    def solve_maze(self, render=True, gif_path=GIF_PATH, renderer='cached', parallel=False, algorithms=None):
+        """
+        Main Function with BFS/DFS/A*/JPS Logic.
+        render=True streams the side by side animation to gif_path, drawn by renderer.
+        render=False runs each algorithm to completion back to back with no
+        drawing or GIF output, timing only the search loop.
+        parallel=True runs each algorithm in its own worker process, see _solve_parallel.
+        algorithms limits the run to the named titles (default: all).
+        Returns {title: {'path', 'steps', 'visited', 'elapsed', 'complete'}}, complete is False
+        only for a Hug Left run that gave up circling. With an Instrument each title also has 'stats'.
+        With a PathCache each title also has 'cached_legs', legs taken from the cache are not
+        searched and add no steps or visited cells.
+        """
+        if parallel and self.cache is not None:
+            raise ValueError("A PathCache cannot be shared with parallel workers, solve serially")
+        self._get_path()
+        trackers = self._init_trackers(algorithms)
+
+        if parallel:
+            return self._solve_parallel(trackers, render, gif_path, renderer)
+
+        if not render:
+            for name, tracker in trackers.items():
+                t0 = time.perf_counter()
+                while not tracker[4]:
+                    self._step(name, tracker)
+                tracker[5] = time.perf_counter() - t0
+            return self._results(trackers)
+
+        #Frames are encoded as they are drawn, only the latest is kept in memory
+        draw_frame = self._frame_renderer(renderer, trackers)
+        with GifStreamWriter(os.path.join(self.script_dir, gif_path), duration=40) as gif:
+            while not all(tracker[4] for tracker in trackers.values()):
+                for name, tracker in trackers.items():
+                    if not tracker[4]:
+                        t0 = time.perf_counter()
+                        self._step(name, tracker)
+                        tracker[5] += time.perf_counter() - t0
+                gif.write(draw_frame(trackers))
+
+            #Freeze on the final frame for 30 extra frame periods, the final state is the only frame if no step ran
+            if gif.pending is None:
+                gif.write(draw_frame(trackers))
+            gif.close(hold=30 * 40)
+        return self._results(trackers)
+
+    def _solve_parallel(self, trackers, render, gif_path, renderer):
+        """
+        Runs every algorithm to completion in its own process, so wall time is roughly the slowest one.
+        With render=True each worker records a per-step trace, which is replayed here in
+        lockstep to draw the same side by side animation as the interleaved loop.
+        """
+        with ProcessPoolExecutor(max_workers=len(trackers)) as pool:
+            runs = list(pool.map(_solve_worker, [(self, name, render) for name in trackers]))
+        results = {name: result for name, (result, _) in zip(trackers, runs)}
+        if not render:
+            return results
+
+        traces = {name: trace for name, (_, trace) in zip(trackers, runs)}
+        draw_frame = self._frame_renderer(renderer, trackers)
+        with GifStreamWriter(os.path.join(self.script_dir, gif_path), duration=40) as gif:
+            for i in range(max(len(trace[1]) for trace in traces.values())):
+                for name, tracker in trackers.items():
+                    path, steps = traces[name]
+                    if i < len(steps):
+                        self._replay_step(tracker, path, steps[i])
+                        tracker[4] = i + 1 == len(steps)
+                gif.write(draw_frame(trackers))
+            if gif.pending is None:
+                gif.write(draw_frame(trackers))
+            gif.close(hold=30 * 40)
+        return results
+
+    def _record_step(self, name, tracker):
+        """
+        Steps tracker once and returns what changed for replay:
+        (Leg Reset, Newly Visited Cells, Path Length, Current Target, Elapsed Time)
+        """
+        if not isinstance(tracker[2], _RecordedMask):
+            tracker[2] = _RecordedMask(tracker[2])
+        visited = tracker[2]
+        t0 = time.perf_counter()
+        self._step(name, tracker)
+        tracker[5] += time.perf_counter() - t0
+
+        #A new leg swaps in a plain mask, its cells are read once and it is wrapped for the next step
+        reset = tracker[2] is not visited
+        added = np.flatnonzero(np.frombuffer(tracker[2], dtype=np.uint8)).tolist() if reset else visited.added
+        if reset:
+            tracker[2] = _RecordedMask(tracker[2])
+        else:
+            visited.added = []
+        return (reset, added, len(tracker[1]), tracker[0], tracker[5])
+
+    def _replay_step(self, tracker, path, step):
+        """Applies one recorded step to a tracker, path is the final path of the algorithm"""
+
+        reset, added, length, target, elapsed = step
+        if reset:
+            tracker[2] = self.grid.new_mask()
+        for cell in added:
+            tracker[2][cell] = 1
+        tracker[1] = path[:length]
+        tracker[0], tracker[5] = target, elapsed
+        tracker[6] += 1
+
+    def _frame_renderer(self, renderer, trackers):
+        """
+        Returns a callable turning trackers into one frame.
+        cached: PanelRenderer, static layer plus per-step deltas (default)
+        draw:   redraws every cell with ImageDraw each frame (legacy)
+        """
+        scale = max(1, 360 // max(self.width, self.height)) #12px cells on 30x30
+        match renderer:
+            case 'cached':
+                return PanelRenderer(self, list(trackers), scale).render
+            case 'draw':
+                return lambda trackers: self._draw_frame(trackers, scale)
+            case _:
+                raise ValueError(f"Unknown renderer: {renderer}")
+
+    def _draw_frame(self, trackers, scale):
+        """Legacy full redraw of every panel"""
+
+        maze_w, maze_h, padding = self.width * scale, self.height * scale, 40
+        canvas_w, canvas_h = (maze_w + padding) * len(trackers), maze_h + 100
+        frame = Image.new('RGB', (canvas_w, canvas_h), (240, 240, 240))
+        draw = ImageDraw.Draw(frame)
+        for i, (name, tracker) in enumerate(trackers.items()):
+            self._draw_submaze(draw, i*(maze_w+padding)+padding, 50, scale, tracker[2], tracker[1], name, tracker[6], tracker[5], tracker[0])
+        return frame
+
+
+def _solve_worker(job):
+    """
+    Process pool entry point, runs one algorithm of a planned solver to completion.
+    Returns (result, trace), trace is (Path, [Recorded Step]) when record is set, else None.
+    """
+    solver, name, record = job
+    tracker = solver._init_trackers([name])[name]
+
+    if not record:
+        t0 = time.perf_counter()
+        while not tracker[4]:
+            solver._step(name, tracker)
+        tracker[5] = time.perf_counter() - t0
+        return solver._results({name: tracker})[name], None
+
+    steps = []
+    while not tracker[4]:
+        steps.append(solver._record_step(name, tracker))
+    return solver._results({name: tracker})[name], (tracker[1], steps)
+
+
+def _print_results(results):
+    """Prints the README comparison table"""
+
+    names = list(results)
+    rows = [
+        ("Steps", [f"{r['steps']}" for r in results.values()]),
+        ("Visited", [f"{r['visited']}" for r in results.values()]),
+        ("Avg. Time per Step (us)", [f"{r['elapsed'] / max(r['steps'], 1) * 1e6:.2f}" for r in results.values()]),
+        ("Total Elapsed Time (ms)", [f"{r['elapsed'] * 1000:.2f}" for r in results.values()]),
+        ("Path Length", [f"{len(r['path'])}" for r in results.values()])
+    ]
+    if all('cached_legs' in r for r in results.values()):
+        rows.append(("Cached Legs (not searched)", [f"{r['cached_legs']}" for r in results.values()]))
+    if all('stats' in r for r in results.values()):
+        for label, key in [("Expansions", 'expansions'), ("Pushes", 'pushes'), ("Re-expansions", 'reexpansions'),
+                ("Peak Frontier", 'peak_frontier'), ("Peak Visited", 'peak_visited')]:
+            rows.append((label, [f"{r['stats'][key]}" for r in results.values()]))
+    print("| Criteria | " + " | ".join(names) + " |")
+    print("| --- " * (len(names) + 1) + "|")
+    for label, cells in rows:
+        print(f"| {label} | " + " | ".join(cells) + " |")
 
 
 if __name__ == "__main__":
-    solver = MazeSolverV2(BITSTREAM_PATH)
-    solver.solve_maze()
+    parser = argparse.ArgumentParser(description="Solve a maze bitstream with Hug Left, BFS, Greedy DFS, A-Star, JPS and bidirectional BFS / A-Star.")
+    parser.add_argument('path', nargs='?', default=BITSTREAM_PATH, help="Instruction binary (default: BITSTREAM_PATH)")
+    parser.add_argument('--index', type=int, help="Maze number within a container or multi-maze archive")
+    parser.add_argument('--headless', action='store_true', help="Skip rendering and GIF output, only solve and report")
+    parser.add_argument('--gif', default=GIF_PATH, help="Animation output path (default: GIF_PATH)")
+    parser.add_argument('--renderer', default='cached', choices=['cached', 'draw'], help="Frame renderer, draw is the legacy full redraw")
+    parser.add_argument('--parallel', action='store_true', help="Run each algorithm in its own worker process")
+    parser.add_argument('--algorithms', nargs='*', help="Titles to run, e.g. A-Star Bi-A-Star (default: all)")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON instead of a table")
+    parser.add_argument('--planner', default='auto', choices=['auto', 'greedy', 'held-karp', 'local'],
+        help="Objective ordering strategy")
+    parser.add_argument('--cache', help="SQLite file to keep leg paths in between runs")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="Leg paths kept in memory")
+    parser.add_argument('--unreachable', default='skip', choices=['skip', 'raise'],
+        help="Walled off gems, monsters and hearts: leave them out of the route or reject the maze")
+    parser.add_argument('--stats', action='store_true', help="Count expansions, pushes, peaks and per-leg timings")
+    parser.add_argument('--profile', help="Write a cProfile and tracemalloc report of the solve to this JSON file")
+    args = parser.parse_args()
+    if args.parallel and args.cache:
+        parser.error("--cache cannot be combined with --parallel, workers would race on the cache file")
+
+    cache = PathCache(args.cache_size, args.cache) if args.cache else None
+    solver = MazeSolverV2(args.path, planner=args.planner, index=args.index, cache=cache, unreachable=args.unreachable,
+        instrument=Instrument() if args.stats else None)
+    options = dict(render=not args.headless, gif_path=args.gif, renderer=args.renderer,
+        parallel=args.parallel, algorithms=args.algorithms)
+    if args.profile:
+        results, report = profiled(solver.solve_maze, **options)
+        with open(args.profile, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        results = solver.solve_maze(**options)
+    if solver.skipped:
+        print(f"Skipped unreachable: {solver.skipped}", file=sys.stderr)
+    if cache:
+        print(f"Path cache: {cache.stats()}", file=sys.stderr)
+        cache.close()
+    if args.json:
+        print(json.dumps(results))
+    else:
+        _print_results(results)
@@ -0,0 +1,228 @@
+"""
+Push style decoder for instruction streams that arrive in pieces (UART, pipe, socket).
+Bytes are fed in chunks of any size, every complete 32-bit instruction is applied to the
+grid and entity lists of the maze in progress straight away, and finished mazes are handed
+back as soon as their last instruction lands. Only the maze in progress and up to three
+bytes of a split instruction are held, however long the stream.
+
+Run directly to decode a file or stdin chunk by chunk.
+Refer to README.md for the maze boundary rules.
+"""
+
+
+import sys
+import time
+import argparse
+import numpy as np
+from maze_grid import MazeGrid
+from maze_decoder import VERSION_RLE, VERSION_RLE_XOR
+
+
+CHUNK = 4096    #Bytes read per call by stream_mazes
+INVERT = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class MazeStream:
+    """
+    Incremental decoder, same mazes as MazeArchive over the same bytes.
+    feed() returns the mazes completed by a chunk as (MazeGrid, Start Point, End Point,
+    {'gems', 'monsters', 'hearts'}). grid, start_pos, end_pos and entities show the maze
+    in progress, so a consumer can start on the walls before the maze is complete.
+    """
+
+    def __init__(self):
+        self.pending = b''
+        self.depth = 0
+        self.count = 0          #Mazes completed so far
+        self._reset()
+
+    def _reset(self):
+        """State of a new maze, the grid is allocated on its first instruction"""
+
+        self.grid = None
+        self.start_pos = None
+        self.end_pos = None
+        self.entities = {'gems': [], 'monsters': [], 'hearts': []}
+        self.instructions = 0
+        self.row = 0
+        self.runs = None        #Run length walls (row major, XOR mode only), set by a run length MAZE_HEADER
+
+    def feed(self, data):
+        """Decodes every instruction completed by data, returns the mazes that finished"""
+
+        data = self.pending + bytes(data)
+        whole = len(data) - len(data) % 4
+        self.pending = data[whole:]
+        done = []
+        for instr in np.frombuffer(data, dtype='>u4', count=whole // 4).tolist():
+            if self._apply(instr):
+                done.append(self._finish())
+        return done
+
+    def close(self):
+        """
+        End of stream. Returns the unterminated maze in progress as a one item list (empty if
+        there is none), like the unterminated tail of MazeArchive. A split instruction is dropped.
+        """
+        self.pending = b''
+        return [self._finish()] if self.instructions else []
+
+    def _finish(self):
+        """Completes the maze in progress and starts a new one"""
+
+        if self.runs is not None:
+            self._end_runs()
+        maze = (self.grid or MazeGrid(), self.start_pos, self.end_pos, self.entities)
+        self.count += 1
+        self._reset()
+        return maze
+
+    def _apply(self, instr):
+        """Applies one instruction to the maze in progress, True if it completed the maze"""
+
+        if self.grid is None:
+            self.grid = MazeGrid()
+        self.instructions += 1
+        opcode = instr & 0xF
+        match opcode:
+            case 0x1: #Make Wall, row 29 right half ends a legacy maze
+                y = (instr >> 4) & 0xFF
+                half = (instr >> 12) & 0xF
+                wall_data = (instr >> 16) & 0x7FFF
+                for i in range(15):
+                    if wall_data & (1 << (14 - i)):
+                        self.grid.set_wall(i if half == 0 else i + 15, y)
+                return self.depth == 0 and y == 29 and half != 0
+
+            case 0x2: #Place Entity
+                self._place_entity(instr, (instr >> 16) & 0xFF, (instr >> 24) & 0xFF)
+
+            case 0x3: #Maze Header (Extended)
+                width, height = (instr >> 20) & 0xFFF, (instr >> 8) & 0xFFF
+                self.grid = MazeGrid(width, height)
+                self.depth += 1
+                self.runs = None
+                if (instr >> 4) & 0xF in (VERSION_RLE, VERSION_RLE_XOR):
+                    #XOR mode keeps the decoded run walls, the next row is relative to them
+                    self.xor = (instr >> 4) & 0xF == VERSION_RLE_XOR
+                    self.runs = bytearray(width * height if self.xor else 0)
+                    self.size, self.pos, self.value = width * height, 0, 0
+
+            case 0x4: #Set Row (Extended)
+                self.row = (instr >> 16) & 0xFFFF
+
+            case 0x5: #Make Wall Segment (Extended)
+                seg = (instr >> 4) & 0xFFF
+                wall_data = (instr >> 16) & 0xFFFF
+                for i in range(16):
+                    if wall_data & (1 << (15 - i)):
+                        self.grid.set_wall(seg * 16 + i, self.row)
+
+            case 0x6: #Place Entity (Extended)
+                self._place_entity(instr, (instr >> 16) & 0xFFFF, self.row)
+
+            case 0x7 if self.runs is not None: #Wall Runs (Run Length)
+                for i in range(9):
+                    length = (instr >> (29 - 3 * i)) & 0x7
+                    if length:
+                        self._run(length, self.value)
+                    else:
+                        self.value ^= 1
+
+            case 0x8 if self.runs is not None: #Wall Run Long (Run Length)
+                self._run(instr >> 5, (instr >> 4) & 0x1)
+
+            case 0xF: #End Maze (Extended)
+                self.depth = max(0, self.depth - 1)
+                return True
+        return False
+
+    def _run(self, length, value):
+        """Writes one run at the run position, split at row ends, and toggles the run value"""
+
+        width, end = self.grid.width, min(self.pos + length, self.size)
+        while self.pos < end:
+            y, x = divmod(self.pos, width)
+            stop = min(self.pos + width - x, end)
+            if self.xor:
+                bits = self.runs[self.pos - width:stop - width] if y else bytes(stop - self.pos)
+                if value:
+                    bits = bits.translate(INVERT) if y else b'\x01' * (stop - self.pos)
+                self.runs[self.pos:stop] = bits
+            else:
+                bits = b'\x01' * (stop - self.pos) if value else b''
+            if 1 in bits:
+                self._wall(self.grid.index(x, y), bits)
+            self.pos = stop
+        self.value = value ^ 1
+
+    def _wall(self, cell, bits):
+        """ORs a row slice of wall bytes into the grid from cell on"""
+
+        cells = self.grid.cells
+        old = cells[cell:cell + len(bits)]
+        if 1 in old:
+            bits = (int.from_bytes(old, 'big') | int.from_bytes(bits, 'big')).to_bytes(len(bits), 'big')
+        cells[cell:cell + len(bits)] = bits
+
+    def _end_runs(self):
+        """Cells after the last run are open, in XOR mode that repeats the row above"""
+
+        width, height = self.grid.width, self.grid.height
+        if self.xor and self.pos < self.size:
+            y, x = divmod(self.pos, width)
+            if x:
+                if y:
+                    self._run(width - x, 0)
+                y += 1
+            if y:
+                last = bytes(self.runs[(y - 1) * width:y * width])
+                if 1 in last:
+                    for row in range(y, height):
+                        self._wall(self.grid.index(0, row), last)
+        self.runs = None
+
+    def _place_entity(self, instr, x, y):
+        """Decodes FUNCT1/FUNCT2 shared by both place entity opcodes"""
+
+        funct1 = (instr >> 12) & 0xF
+        funct2 = (instr >> 8) & 0xF
+        match funct1:
+            case 0x1 if funct2 == 0x1: #Start Point
+                self.start_pos = (x, y)
+            case 0x1 if funct2 == 0x2: #End Point
+                self.end_pos = (x, y)
+            case 0x2: #Hearts
+                self.entities['hearts'].append((x, y))
+            case 0x4: #Gems
+                self.entities['gems'].append((x, y))
+            case 0x8: #Monsters
+                self.entities['monsters'].append((x, y))
+
+
+def stream_mazes(source, chunk=CHUNK):
+    """
+    Yields each maze of a file-like object (read) or socket (recv) as soon as it is complete,
+    reading chunk bytes at a time.
+    """
+    read = getattr(source, 'read', None) or source.recv
+    stream = MazeStream()
+    while data := read(chunk):
+        yield from stream.feed(data)
+    yield from stream.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode a maze instruction stream chunk by chunk.")
+    parser.add_argument('path', nargs='?', help="Instruction stream or archive (default: stdin)")
+    parser.add_argument('--chunk', type=int, default=CHUNK, help="Bytes read per call")
+    args = parser.parse_args()
+
+    source = open(args.path, "rb") if args.path else sys.stdin.buffer
+    t0 = time.perf_counter()
+    print("| Maze | Size | Start Point | End Point | Gems | Monsters | Hearts | Ready (ms) |")
+    print("| --- | --- | --- | --- | --- | --- | --- | --- |")
+    with source:
+        for n, (grid, start, end, entities) in enumerate(stream_mazes(source, args.chunk)):
+            print(f"| {n} | {grid.width}x{grid.height} | {start} | {end} | {len(entities['gems'])} | "
+                f"{len(entities['monsters'])} | {len(entities['hearts'])} | {(time.perf_counter() - t0)*1000:.2f} |")